@@ -1,31 +1,98 @@
+from itertools import islice
+
 #add all required user defined libraries
 import seats
 from models import User
 import waitlist
 import reservations
+import snapshot
+import instrumentation
 
 class GatorTicketMaster():
     """
     Class to initialize the control services for the ticketing system. It has all the logic layer for the 10 functions required in the Problem Statement.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, seatAllocator: str = "heap", reservationEngine: str = "linked", waitlistBackend: str = "heap") -> None:
         """
-        Initialise the ticketing service
+        Initialise the ticketing service. seatAllocator selects the backend for the available seats,
+        "heap" for a min heap of seat numbers or "interval" for a set of free seat intervals.
+        reservationEngine selects the Red Black Tree, "linked" for Booking nodes or "array" for the array backed tree.
+        waitlistBackend selects the waitlist, "heap" for the binary heap, "lazy" for the heap with lazy deletion
+        that makes mass exits O(k), or "ranked" for the treap that answers waitlist positions in O(log n).
         """
+        if seatAllocator not in seats.ALLOCATORS:
+            raise ValueError(f"Unknown seat allocator {seatAllocator}, choose from {', '.join(seats.ALLOCATORS)}")
+        if reservationEngine not in reservations.ENGINES:
+            raise ValueError(f"Unknown reservation engine {reservationEngine}, choose from {', '.join(reservations.ENGINES)}")
+        if waitlistBackend not in waitlist.WAITLISTS:
+            raise ValueError(f"Unknown waitlist backend {waitlistBackend}, choose from {', '.join(waitlist.WAITLISTS)}")
         self.eventInitialized = False #variable to save if the Initialize function has been called or not, as the reservations can't start if seats are available.
+        self.seatAllocator = seats.ALLOCATORS[seatAllocator]
         self.seats = None
+        self.waitlistBackend = waitlist.WAITLISTS[waitlistBackend]
         self.waitlist = None
-        self.reservations = reservations.RedBlackTree()
+        self.reservations = reservations.ENGINES[reservationEngine]()
+        self.mapped = None #snapshot the read only calls are answered from until the first change
+        self.sequence = 0 #service wide counter, the order of arrival of waitlisted users for ties on priority
+        self.instrumentation = None #timing of every public method, only when enabled
+
+    @classmethod
+    def openSnapshot(cls, path, **options):
+        """
+        Opens a snapshot file for reading through mmap. available, search and the seat ordered listing are answered
+        from the mapped file, the heaps and the tree are only built by the first call that changes the state.
+        options are passed to the constructor.
+        """
+        gtm = cls(**options)
+        gtm.mapped = snapshot.MappedSnapshot(path)
+        gtm.eventInitialized = gtm.mapped.initialized
+        return gtm
+
+    def materialize(self) -> None:
+        """
+        builds the heaps and the tree from the mapped snapshot, if there is one, and unmaps it.
+        """
+        if self.mapped is None:
+            return
+        mapped, self.mapped = self.mapped, None
+        try:
+            mapped.restore(self)
+        finally:
+            mapped.close()
+
+    def enableInstrumentation(self):
+        """
+        starts timing and counting every public method of this service, returns the Instrumentation so that
+        profiling hooks can be set on it. The methods are only wrapped from here on, until disableInstrumentation.
+        """
+        if self.instrumentation is None:
+            self.instrumentation = instrumentation.Instrumentation()
+            self.instrumentation.attach(self)
+        return self.instrumentation
+
+    def disableInstrumentation(self) -> None:
+        if self.instrumentation is not None:
+            self.instrumentation.detach()
+            self.instrumentation = None
+
+    def stats(self) -> dict:
+        """
+        operation counters and latency histograms when instrumentation is enabled, and the current structure sizes.
+        """
+        if self.instrumentation is None:
+            return {"operations": {}, "gauges": instrumentation.gauges(self)}
+        return self.instrumentation.stats()
 
     def initialize(self,seatCount: int):
         """
-        function to initailise the seats heap. Calls the MinHeapSeats constructor which creates a heap with nodes 1 to seatCount
+        function to initailise the seats heap. Calls the seat allocator constructor (MinHeapSeats by default) which creates a heap with nodes 1 to seatCount
         """
+        self.materialize()
         if(self.eventInitialized == True):
             return "Seats already initialized. Please try to add seats"
+        self.seats = self.seatAllocator(seatCount)
         self.eventInitialized = True
-        self.seats = seats.MinHeapSeats(seatCount)
 
         return f"{seatCount} Seats are made available for reservation"
 
@@ -37,6 +104,9 @@ class GatorTicketMaster():
         #check if the seats heap has been initialised or not.
         if self.eventInitialized == False:
             return "Seats not initialized yet!!"
+        elif self.mapped is not None:
+            #counts are stored in the snapshot header
+            return f"Total Seats Available : {self.mapped.freeSeats}, Waitlist : {self.mapped.waitlistSize}"
         else:
             availabel_seats = self.seats.size()
             waitlist_count = 0 if(self.waitlist == None) else self.waitlist.size()
@@ -46,14 +116,18 @@ class GatorTicketMaster():
         """
         function to book a seat for a user with its Id. If no seats are available then it add it to waitlist with the priority.
         """
+        self.materialize()
+        #checked before any seat is taken, a userID the tree can't store would lose the seat. Waitlisted users are
+        #checked too, they are booked later by cancel and promoteWaitlist
+        if not self.reservations.acceptsKey(userID):
+            return f"Invalid userID {userID}, out of range for the reservation engine"
         if(self.waitlist == None):
-            self.waitlist = waitlist.MinHeapUser()
-        
-        newUser = User(userID,userPriority) #create a user node
+            self.waitlist = self.waitlistBackend()
         
         #check is seats available
         if(self.seats.size() == 0):
-            self.waitlist.push(newUser) #push node to waitlist
+            self.sequence += 1
+            self.waitlist.push(User(userID, userPriority, self.sequence)) #create a user node and push it to waitlist
             return f"User {userID} is added to the waiting list"
         else:
             #take the lowest seatID from heap and userID and pass to Red Black tree for insert
@@ -62,19 +136,109 @@ class GatorTicketMaster():
             return f"User {userID} reserved seat {seatID}"
 
 
+    def reserveMany(self, users):
+        """
+        function to book seats for a batch of (userID, userPriority) in one call. The lowest seats are taken in one pass
+        and the bookings are inserted into the tree as a batch, remaining users are added to the waitlist as a batch.
+        Returns the same outputs, in the same order, as calling reserve for each user one at a time.
+        """
+        self.materialize()
+        if(self.waitlist == None):
+            self.waitlist = self.waitlistBackend()
+
+        users = list(users)
+        if not all(self.reservations.acceptsKey(userID) for userID, _ in users):
+            #rare, one at a time gives the rejected users their message in place. The class method, not an instrumented wrapper
+            return [GatorTicketMaster.reserve(self, userID, userPriority) for userID, userPriority in users]
+        seatIDs = self.seats.pollMany(len(users)) #lowest seats in increasing order, fewer than asked if seats run out
+        booked = [(userID, seatID) for (userID, _), seatID in zip(users, seatIDs)]
+        self.reservations.bulkInsert(booked)
+        waiting = users[len(seatIDs):]
+        self.waitlist.pushMany(User(userID, userPriority, self.sequence + offset) for offset, (userID, userPriority) in enumerate(waiting, 1))
+        self.sequence += len(waiting)
+
+        output = [f"User {userID} reserved seat {seatID}" for userID, seatID in booked]
+        output.extend(f"User {userID} is added to the waiting list" for userID, _ in waiting)
+        return output
+
+    def reserveBlock(self, userIDs, k):
+        """
+        function to book k adjacent seats for a group, userIDs[i] gets the i-th seat of the lowest numbered block
+        of k free seats. Nobody is waitlisted if there is no such block, the group can retry after seats are added.
+        The free seats are wrapped with a FreeRunTree on the first call, the block is then found in O(log n).
+        """
+        self.materialize()
+        userIDs = list(userIDs)
+        if len(userIDs) != k:
+            return [f"A block of {k} seats needs {k} users, got {len(userIDs)}"]
+        if self.eventInitialized == False:
+            return ["Event not initialized yet!!"]
+        for userID in userIDs:
+            if not self.reservations.acceptsKey(userID):
+                return [f"Invalid userID {userID}, out of range for the reservation engine"]
+        if(self.waitlist == None):
+            self.waitlist = self.waitlistBackend() #cancel and releaseSeats expect it once there are reservations
+
+        if not isinstance(self.seats, seats.BlockSeats):
+            self.seats = seats.BlockSeats(self.seats)
+        start = self.seats.findBlock(k)
+        if start is None:
+            return [f"No {k} adjacent seats available"]
+        self.seats.takeRun(start, k)
+        for seatID, userID in enumerate(userIDs, start):
+            self.reservations.addReservation(userID, seatID)
+        return [f"User {userID} reserved seat {seatID}" for seatID, userID in enumerate(userIDs, start)]
+
+    def whoHolds(self, seatID):
+        """
+        function to find the user holding a seat in O(1) from the seat index. Returns the userID, or None if the seat is not reserved.
+        """
+        if self.mapped is not None:
+            return self.mapped.holderOf(seatID)
+        return self.reservations.seatIndex.holder(seatID)
+
+    def search(self, userID):
+        """
+        function to find the seat reserved by a user. Returns the seatID, or None if the user has no reservation.
+        """
+        if self.mapped is not None:
+            return self.mapped.seatOf(userID)
+        booking = self.reservations.search(self.reservations.root, userID)
+        return None if booking is None else self.reservations.seatOf(booking)
+
+    def waitlistPosition(self, userID):
+        """
+        function to find the position of a user in the waitlist, 1 for the next user to get a seat.
+        Returns None if the user is not waitlisted. O(log n) with the ranked backend, O(n) with the heap.
+        """
+        self.materialize()
+        if self.waitlist is None:
+            return None
+        return self.waitlist.rank(userID)
+
+    def waitlistTop(self, k):
+        """
+        function to list the userIDs of the next k users to get a seat, in the order they will get it.
+        """
+        self.materialize()
+        if self.waitlist is None:
+            return []
+        return self.waitlist.topK(k)
+
     def cancel(self,seatID, userID):
+        self.materialize()
         #check if seats initialised or not
         if(self.eventInitialized == False):
             return ["Event not initialized yet!!"]
         
-        #check if a node with the userID is present in reservations or not
+        #check if a node with the userID is present in reservations or not, the tree has to be searched for the node to delete anyway
         data = self.reservations.search(self.reservations.root,userID)
 
         if(data == None):
             return [f"User {userID} has no reservation to cancel"]
 
         #reservation present but with different seatID
-        elif(data.seatID != seatID):
+        elif(self.reservations.seatOf(data) != seatID):
             return [f"User {userID} has no reservation for seat {seatID} to cancel"]
         
         #waitlist is not empty so, cancel reservation and rebook for waitlist user.
@@ -92,19 +256,21 @@ class GatorTicketMaster():
 
 
     def exitWaitlist(self,userID):
+        self.materialize()
         #if waitlist is empty or not initialise, no node to return
         if(self.waitlist == None or self.waitlist.size() == 0):
             return f"User {userID} is not in waitlist"
         
         else:
-            #search and delete node from waitlist heap, if present
-            check_delete = self.waitlist.remove(userID)
-            if check_delete == False:
+            #O(1) membership check on the waitlist index before removing the node
+            if not self.waitlist.contains(userID):
                 return f"User {userID} is not in waitlist"
             else:
+                self.waitlist.remove(userID)
                 return f"User {userID} is removed from the waiting list"
 
     def updatePriority(self,userID, userPriority):
+        self.materialize()
         #if waitlist is empty or not initialise, no node to update
         if(self.waitlist == None or self.waitlist.size() == 0):
             return f"User {userID} priority is not updated"
@@ -118,6 +284,7 @@ class GatorTicketMaster():
                 return f"User {userID} priority has been updated to {userPriority}"
 
     def addSeats(self,count):
+        self.materialize()
         #check if seats have been initialised or not, can't add seats if not initialise to begin with.
         if self.eventInitialized == False:
             return "Seats not initialized!!"
@@ -129,22 +296,47 @@ class GatorTicketMaster():
 
             #for each available seat and user in waitlist book a reservation.
             if(self.waitlist is not None and self.waitlist.size() > 0):
-                while(self.seats.isEmpty() == False and self.waitlist.size() > 0):
-                    userObj = self.waitlist.poll()
-                    output.append(self.reserve(userObj.userID, userObj.priority)) #collects output for individual operation
+                output.extend(self.promoteWaitlist())
             
         return output
 
+    def promoteWaitlist(self) -> list:
+        """
+        books the free seats for the first users of the waitlist, as many as both allow. The users and the lowest seats
+        are taken as two batches and the bookings are inserted into the tree as one, the i-th user in line gets the
+        i-th lowest seat exactly as polling them one at a time does. Returns the output line of every booking.
+        Every waitlisted userID was accepted by the tree when it was reserved, so the batch insert can't fail halfway.
+        """
+        count = min(self.waitlist.size(), self.seats.size())
+        if count == 0:
+            return []
+        users = self.waitlist.pollMany(count)
+        seatIDs = self.seats.pollMany(count)
+        booked = [(user.userID, seatID) for user, seatID in zip(users, seatIDs)]
+        self.reservations.bulkInsert(booked)
+        return [f"User {userID} reserved seat {seatID}" for userID, seatID in booked]
+
     def printReservations(self):
         #check if there is no reservation yet. Nothing to print.
         if(self.reservations.isEmpty() == "True"):
             return []
         
-        bookings = []
-        self.reservations.inorder(self.reservations.root,bookings=bookings) #traverse inorder of userID
-        return sorted(bookings, key=lambda bookings: bookings[0]) #sort output in order of SeatID
+        #the class method, so that an instrumented service does not also count this as an iterReservations call
+        return [[seatID, userID] for seatID, userID in GatorTicketMaster.iterReservations(self)]
+
+    def iterReservations(self, start_seat=None, limit=None):
+        """
+        Lazily yields (seatID, userID) tuples ordered by seat number, without building the full list.
+        start_seat works as a pagination cursor, the next page starts from the last seat returned + 1,
+        and limit caps the number of tuples yielded. The reservations should not be modified while iterating.
+        """
+        #the seat index is already in order of SeatID, no need to traverse the tree and sort
+        index = self.reservations.seatIndex if self.mapped is None else self.mapped
+        bookings = index.items(1 if start_seat is None else start_seat)
+        return bookings if limit is None else islice(bookings, limit)
 
     def releaseSeats(self,userID1, userID2):
+        self.materialize()
         #check if there is no reservation yet. Nothing to remove.
         if(self.reservations.isEmpty() == True):
             return ["No reservations yet!!"]
@@ -155,38 +347,33 @@ class GatorTicketMaster():
         
         result = []
         
+        #only the bookings that actually exist in the range are visited, not every id in it
+        released = self.reservations.rangeQuery(userID1, userID2)
+        freed_seats = [self.reservations.seatOf(booking) for booking in released] #read before the nodes are deleted
+
         #Case 1: waitlist is not empty
         if(self.waitlist is not None and self.waitlist.size()>0):
-            for i in range(userID1, userID2+1):
-                booking = self.reservations.search(self.reservations.root,i)
+            booked = set()
+            for booking in released:
                 #case 1(a): node found in reservation red black tree
-                if booking is not None:
-                    seatID = booking.seatID
-                    self.reservations.deleteReservation(booking) #delete node
-                    self.seats.push(seatID) #add seats to available seats
-
-                #case 1(b): node not in reservations. Check in waitlist and delete.
-                else:
-                    self.waitlist.remove(i)
+                booked.add(self.reservations.userOf(booking))
+                self.reservations.deleteReservation(booking) #delete node
+            self.seats.pushMany(freed_seats) #add seats to available seats as one batch
+
+            #case 1(b): node not in reservations. Check in waitlist and delete, as one batch.
+            self.waitlist.removeMany([i for i in self.waitlist.usersInRange(userID1, userID2) if i not in booked])
             
             result.append(f"Reservations of the Users in the range [{userID1}, {userID2}] are released")
             
             #since waitlist is not empty, while seats lasts book all the available users in waitlist
-            while(self.waitlist.size()>0 and self.seats.size()>0):
-                waitlist_user = self.waitlist.poll().userID
-                new_seat = self.seats.poll()
-                self.reservations.addReservation(waitlist_user, new_seat)
-                result.append(f"User {waitlist_user} reserved seat {new_seat}")
+            result.extend(self.promoteWaitlist())
 
         #case 2: waitlist is empty
         else:
-            for i in range(userID1, userID2+1):
-                booking = self.reservations.search(self.reservations.root,i)
+            for booking in released:
                 #case 2(a):node present in reservations
-                if booking is not None:
-                    seatID = booking.seatID
-                    self.reservations.deleteReservation(booking) #delete it
-                    self.seats.push(seatID) #add seat to available seats
+                self.reservations.deleteReservation(booking) #delete it
+            self.seats.pushMany(freed_seats) #add seats to available seats as one batch
 
             result.append(f"Reservations/waitlist of the users in the range [{userID1}, {userID2}] have been released")
 
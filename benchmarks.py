@@ -0,0 +1,730 @@
+"""
+Benchmarks for the Gator Ticket Master data structures. Each benchmark is run by its name, for example:
+    python3 benchmarks.py memory --n 1000000
+and prints its measurements on the terminal.
+"""
+import argparse
+import cProfile
+import collections
+import gc
+import json
+import math
+import multiprocessing
+import pstats
+import random
+import resource
+import shutil
+import sys
+import sysconfig
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import GatorTicketMasterService
+import instrumentation
+import models
+import persistence
+import registry
+import reservations
+import seats
+import snapshot
+import threadsafe
+import waitlist
+import workload
+
+SUITE_OUTPUT = "bench_output.txt"  # JSON lines written by the suite benchmark
+
+
+def benchMemory(n):
+    """
+    memory held by n bookings in each reservations tree engine and by n users in the waitlist heap, measured with tracemalloc.
+    """
+    tracemalloc.start()
+    for name, engine in reservations.ENGINES.items():
+        base = tracemalloc.get_traced_memory()[0]
+        tree = engine()
+        tree.bulkInsert((userID, userID) for userID in range(1, n + 1))
+        tree_bytes = tracemalloc.get_traced_memory()[0] - base
+        del tree
+        gc.collect()  # linked tree nodes point to their parents, the cycles are only freed by the collector
+        print(f"{n} bookings in {name} RedBlackTree : {tree_bytes / 2**20:.1f} MiB, {tree_bytes / n:.1f} bytes per booking")
+
+    base = tracemalloc.get_traced_memory()[0]
+    heap = waitlist.MinHeapUser()
+    heap.pushMany(models.User(userID, userID % 10, userID) for userID in range(1, n + 1))
+    heap_bytes = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    print(f"{n} users in MinHeapUser : {heap_bytes / 2**20:.1f} MiB, {heap_bytes / n:.1f} bytes per user")
+
+
+def benchStress(n):
+    """
+    stress mode for the traversal paths, runs the heaps and trees with n nodes to show that nothing depends on recursion.
+    Besides a balanced tree, it builds a degenerate tree (a chain of n nodes, the shape sequential userIDs produce when
+    the tree is not rebalanced) and searches and traverses it end to end. Any RecursionError fails the run.
+    """
+    rng = random.Random(42)
+
+    def step(name, function):
+        start = time.perf_counter()
+        function()
+        print(f"{name} : ok in {time.perf_counter() - start:.2f}s")
+        gc.collect()
+
+    def seatHeap():
+        heap = seats.MinHeapSeats(n)
+        for _ in range(1000):
+            heap.poll()
+        heap.pushMany(range(1, 1001))
+        heap.heap.reverse()  # worst case input for a full bottom up heapify
+        heap.heapify()
+        assert heap.poll() == 1
+
+    def userHeap():
+        heap = waitlist.MinHeapUser()
+        heap.pushMany(models.User(userID, rng.randint(1, 10), userID) for userID in range(1, n + 1))
+        for userID in rng.sample(range(1, n + 1), 1000):
+            heap.updatePriority(userID, rng.randint(1, 10))
+        for userID in rng.sample(range(1, n + 1), 1000):
+            heap.remove(userID)
+        for _ in range(1000):
+            heap.poll()
+        assert heap.size() == n - 2000
+
+    def balancedTree():
+        for engine in reservations.ENGINES.values():
+            tree = engine()
+            tree.bulkInsert((userID, userID) for userID in range(1, n + 1))
+            for userID in rng.sample(range(1, n + 1), 1000):
+                assert tree.search(tree.root, userID) is not None
+            bookings = []
+            tree.inorder(tree.root, bookings)
+            assert len(bookings) == n
+            del tree, bookings
+            gc.collect()
+
+    def degenerateTree():
+        tree = reservations.RedBlackTree()
+        parent = None
+        for userID in range(1, n + 1):
+            node = models.Booking(userID, userID)
+            node.left = node.right = tree.leaf
+            node.parent = parent
+            if parent is None:
+                tree.root = node
+            else:
+                parent.right = node
+            parent = node
+        assert tree.search(tree.root, n) is not None
+        bookings = []
+        tree.inorder(tree.root, bookings)
+        assert len(bookings) == n
+        assert len(tree.rangeQuery(n - 10, n)) == 11
+
+    step(f"MinHeapSeats with {n} seats", seatHeap)
+    step(f"MinHeapUser with {n} users", userHeap)
+    step(f"balanced trees with {n} bookings", balancedTree)
+    step(f"degenerate tree, chain of {n} bookings", degenerateTree)
+
+
+def benchThreads(n):
+    """
+    stress test of ThreadSafeTicketMaster: n calls split over 1, 2, 4 and 8 threads on one event, each thread with its
+    own userIDs, mixing reserves, group bookings, cancels, waitlist exits and updates, releases, added seats and
+    lookups. A checker thread verifies the invariants under all the locks while they run, another one keeps
+    calling the lock free available(), and everything is checked again at the end. The throughput only scales with
+    threads on a free-threaded build of CPython (python3.13t) running with the GIL disabled, with the GIL the locks
+    just keep the structures consistent. The build and the GIL state are printed with the results.
+    """
+    freeThreaded = bool(sysconfig.get_config_var("Py_GIL_DISABLED"))
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, {'free-threaded' if freeThreaded else 'default'} build, "
+          f"sys._is_gil_enabled() {gil}")
+    if gil:
+        print("the GIL is enabled, calls/sec will not scale with threads: run under a free-threaded build with "
+              "PYTHON_GIL=0 to measure the scaling")
+
+    def worker(safe, index, calls, errors):
+        rng = random.Random(25 + index)
+        base = (index + 1) * 10 ** 9  # userIDs of this thread
+        users = []
+        try:
+            for _ in range(calls):
+                kind = rng.random()
+                if kind < 0.38:
+                    users.append(base + len(users) + 1)
+                    safe.reserve(users[-1], rng.randint(1, 10))
+                elif kind < 0.40:
+                    group = [base + len(users) + offset for offset in (1, 2, 3)]
+                    users.extend(group)
+                    safe.reserveBlock(group, 3)
+                elif kind < 0.60 and users:
+                    userID = rng.choice(users)
+                    seatID = safe.search(userID)
+                    if seatID is not None:
+                        safe.cancel(seatID, userID)  # the seat is still this user's, only this thread cancels it
+                elif kind < 0.70 and users:
+                    safe.exitWaitlist(rng.choice(users))
+                elif kind < 0.80 and users:
+                    safe.updatePriority(rng.choice(users), rng.randint(1, 10))
+                elif kind < 0.90:
+                    safe.available()
+                elif kind < 0.95:
+                    safe.whoHolds(rng.randint(1, n))
+                elif kind < 0.98 and users:
+                    lo = rng.choice(users)
+                    safe.releaseSeats(lo, lo + rng.randint(0, 5))
+                else:
+                    safe.addSeats(rng.randint(1, 5))
+        except Exception as e:
+            errors.append(e)
+
+    for threads in (1, 2, 4, 8):
+        safe = threadsafe.ThreadSafeTicketMaster()
+        safe.initialize(n // 10)
+        errors = []
+        done = threading.Event()
+
+        def checker():
+            checks = 0
+            while not done.wait(0.2):
+                try:
+                    safe.check()
+                    checks += 1
+                except Exception as e:
+                    errors.append(e)
+            errors.append(checks)  # counted below, not an error
+
+        def reader():
+            while not done.wait(0.001):  # paced, a spinning reader would take the GIL from the workers
+                answer = safe.available()
+                if not answer.startswith("Total Seats Available : "):
+                    errors.append(AssertionError(f"unexpected available() answer {answer!r}"))
+
+        workers = [threading.Thread(target=worker, args=(safe, index, n // threads, errors)) for index in range(threads)]
+        helpers = [threading.Thread(target=checker), threading.Thread(target=reader)]
+        for thread in helpers:
+            thread.start()
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        done.set()
+        for thread in helpers:
+            thread.join()
+        safe.check()
+        checks = sum(error for error in errors if isinstance(error, int))
+        failures = [error for error in errors if not isinstance(error, int)]
+        if failures:
+            raise failures[0]
+        print(f"{threads} threads : {n} calls in {elapsed:.2f}s, {n / elapsed:.0f} calls/sec, GIL {'enabled' if gil else 'disabled'}, "
+              f"invariants held on {checks + 1} checks, {safe.available()}")
+
+
+def benchTreeHealth(n):
+    """
+    inserts n monotonically increasing userIDs one at a time, the worst case for an unbalanced search tree, and checks
+    that every engine stays balanced: height at most 2*log2(n+1) and no invariant violations.
+    """
+    bound = 2 * math.log2(n + 1)
+    for name, engine in reservations.ENGINES.items():
+        tree = engine()
+        start = time.perf_counter()
+        for userID in range(1, n + 1):
+            tree.addReservation(userID, userID)
+        elapsed = time.perf_counter() - start
+        height = tree.height()
+        print(f"{name} : {n} inserts in {elapsed:.2f}s, height {height} (bound {bound:.1f}), black height {tree.blackHeight()}, "
+              f"{tree.rotations} rotations, {tree.recolorings} recolourings")
+        assert height <= bound, f"{name} tree height {height} is above 2*log2(n+1) = {bound:.1f}"
+        problems = tree.validate()
+        assert not problems, f"{name} tree is not a valid Red-Black Tree: {problems[:5]}"
+        del tree
+        gc.collect()
+
+
+def benchRecovery(n):
+    """
+    logs a history of n operations through DurableTicketMaster, with a snapshot taken after 99% of them, then compares
+    recovering from the snapshot and the log tail against replaying the whole history on a new service.
+    """
+    rng = random.Random(13)
+    seat_count = n // 4
+    history = [("initialize", seat_count)]
+    user = 0  # every reserve is by a new user, the other calls name a user that has reserved
+    while len(history) < n:
+        kind = rng.random()
+        if kind < 0.6 or user == 0:
+            user += 1
+            history.append(("reserve", user, rng.randint(1, 10)))
+        elif kind < 0.8:
+            history.append(("cancel", rng.randint(1, seat_count), rng.randint(1, user)))
+        elif kind < 0.95:
+            history.append(("updatePriority", rng.randint(1, user), rng.randint(1, 10)))
+        else:
+            history.append(("exitWaitlist", rng.randint(1, user)))
+
+    directory = tempfile.mkdtemp(prefix="gtm_recovery_")
+    try:
+        durable = persistence.DurableTicketMaster(directory, snapshotEvery=0, groupSize=10_000)
+        start = time.perf_counter()
+        for index, (name, *args) in enumerate(history):
+            try:
+                getattr(durable, name)(*args)
+            except Exception:
+                pass
+            if index + 1 == n - n // 100:
+                durable.snapshot()
+        durable.close()
+        logging = time.perf_counter() - start
+        print(f"{n} operations applied and logged in {logging:.2f}s")
+
+        start = time.perf_counter()
+        recovered, applied = persistence.recover(directory)
+        recovery = time.perf_counter() - start
+        print(f"recovery from snapshot + log tail : {recovery:.2f}s, {applied} operations covered")
+        del recovered, durable
+        gc.collect()
+
+        start = time.perf_counter()
+        replayed = GatorTicketMasterService.GatorTicketMaster()
+        persistence.replay(replayed, ((persistence.OPERATIONS[name][0], *args, 0)[:3] for name, *args in history))
+        full = time.perf_counter() - start
+        print(f"full replay of {n} operations : {full:.2f}s, {full / recovery:.1f}x slower than recovery")
+    finally:
+        shutil.rmtree(directory)
+
+
+def benchMappedSnapshot(n):
+    """
+    writes a snapshot of an event with n bookings and n / 10 waitlisted users, then compares opening it through mmap
+    and answering read only queries against loading every structure from it.
+    """
+    rng = random.Random(14)
+    gtm = GatorTicketMasterService.GatorTicketMaster()
+    gtm.initialize(n)
+    gtm.reserveMany((userID, rng.randint(1, 10)) for userID in range(1, n + n // 10 + 1))
+    directory = tempfile.mkdtemp(prefix="gtm_snapshot_")
+    path = f"{directory}/snapshot.bin"
+    try:
+        snapshot.write(gtm, path)
+        del gtm
+        gc.collect()
+        queries = [rng.randint(1, n) for _ in range(10_000)]
+
+        start = time.perf_counter()
+        mapped = GatorTicketMasterService.GatorTicketMaster.openSnapshot(path)
+        opened = time.perf_counter() - start
+        start = time.perf_counter()
+        mapped.available()
+        for userID in queries:
+            mapped.search(userID)
+        page = list(mapped.iterReservations(n // 2, 1000))
+        answered = time.perf_counter() - start
+        print(f"mmap open : {opened * 1000:.2f}ms, available + {len(queries)} searches + a page of {len(page)} seats in {answered * 1000:.1f}ms")
+        mapped.materialize()
+        del mapped
+        gc.collect()
+
+        start = time.perf_counter()
+        loaded = GatorTicketMasterService.GatorTicketMaster()
+        snapshot.load(loaded, path)
+        full = time.perf_counter() - start
+        print(f"full load of {n} bookings : {full:.2f}s")
+    finally:
+        shutil.rmtree(directory)
+
+
+def benchRegistry(n):
+    """
+    n calls spread over 1000 events, run in a single process without IPC and then through EventRegistry with
+    1, 2, 4 and 8 worker processes. Every event is initialized with 100 seats, then gets reserves, cancels,
+    priority updates and availability checks.
+    """
+    rng = random.Random(15)
+    events = 1000
+    calls = [(eventID, "initialize", (100,)) for eventID in range(events)]
+    users = [0] * events  # userIDs given out per event, every reserve is by a new user
+    while len(calls) < n:
+        eventID = rng.randrange(events)
+        kind = rng.random()
+        if kind < 0.6 or users[eventID] == 0:
+            users[eventID] += 1
+            calls.append((eventID, "reserve", (users[eventID], rng.randint(1, 10))))
+        elif kind < 0.8:
+            calls.append((eventID, "cancel", (rng.randint(1, 100), rng.randint(1, users[eventID]))))
+        elif kind < 0.9:
+            calls.append((eventID, "updatePriority", (rng.randint(1, users[eventID]), rng.randint(1, 10))))
+        else:
+            calls.append((eventID, "available", ()))
+
+    start = time.perf_counter()
+    local = {}
+    for eventID, method, args in calls:
+        gtm = local.get(eventID)
+        if gtm is None:
+            gtm = local[eventID] = GatorTicketMasterService.GatorTicketMaster()
+        getattr(gtm, method)(*args)
+    elapsed = time.perf_counter() - start
+    print(f"single process : {n} calls in {elapsed:.2f}s, {n / elapsed:.0f} calls/sec")
+    del local
+    gc.collect()
+
+    for workers in (1, 2, 4, 8):
+        start = time.perf_counter()
+        with registry.EventRegistry(workers) as events_registry:
+            for eventID, method, args in calls:
+                events_registry.submit(eventID, method, *args)
+        elapsed = time.perf_counter() - start
+        print(f"{workers} workers : {n} calls in {elapsed:.2f}s, {n / elapsed:.0f} calls/sec")
+
+
+def benchWaitlist(n):
+    """
+    pushes n users with random priorities onto the waitlist heap one at a time, then polls them all.
+    """
+    rng = random.Random(17)
+    priorities = [rng.randint(1, 10) for _ in range(n)]
+    heap = waitlist.MinHeapUser()
+    start = time.perf_counter()
+    for userID, priority in enumerate(priorities, 1):
+        heap.push(models.User(userID, priority, userID))
+    pushed = time.perf_counter() - start
+    start = time.perf_counter()
+    while not heap.isEmpty():
+        heap.poll()
+    polled = time.perf_counter() - start
+    print(f"push : {n / pushed:.0f} users/sec, poll : {n / polled:.0f} users/sec")
+
+
+def benchBlock(n):
+    """
+    n seats fully booked, then a random 30% of them cancelled so the free seats are fragmented. Times the first
+    reserveBlock, which builds the FreeRunTree, then 10k group bookings of 2 to 6 seats interleaved with single
+    seat cancels and reserves that keep the tree in sync, for both seat allocators.
+    """
+    rng = random.Random(21)
+    cancelled = rng.sample(range(1, n + 1), n * 3 // 10)
+    for allocator in seats.ALLOCATORS:
+        gtm = GatorTicketMasterService.GatorTicketMaster(seatAllocator=allocator)
+        gtm.initialize(n)
+        gtm.reserveMany((userID, 1) for userID in range(1, n + 1))
+        for seatID in cancelled:
+            gtm.cancel(seatID, seatID)
+        user = n
+        start = time.perf_counter()
+        gtm.reserveBlock([user + 1], 1)
+        built = time.perf_counter() - start
+        user += 1
+
+        blocks = single = 0
+        start = time.perf_counter()
+        for _ in range(10_000):
+            k = rng.randint(2, 6)
+            gtm.reserveBlock(range(user + 1, user + k + 1), k)
+            user += k
+            seatID = rng.randint(1, n)
+            holder = gtm.reservations.seatIndex.holder(seatID)
+            if holder is not None:
+                gtm.cancel(seatID, holder)
+            user += 1
+            gtm.reserve(user, 1)
+            blocks += 1
+            single += 2
+        elapsed = time.perf_counter() - start
+        print(f"{allocator} : tree built on the first block in {built:.2f}s, {blocks} blocks and {single} single seat calls "
+              f"in {elapsed:.2f}s, {(blocks + single) / elapsed:.0f} calls/sec")
+        del gtm
+        gc.collect()
+
+
+def benchCancel(n):
+    """
+    cancel heavy churn: n seats booked and n / 2 users waitlisted, then n cancels. Two thirds of them are by the
+    seat holder and rebook the next waitlisted user, the others name a wrong seat or a user without a seat.
+    Only the cancel calls are timed, finding the holder of a seat for the valid ones is not. cancel validates with
+    one tree search and not against the seat index, on purpose: the search is needed anyway for the node to delete
+    and for the error message, so this measures the tree path, with no index pre-check to compare against.
+    """
+    rng = random.Random(22)
+    gtm = GatorTicketMasterService.GatorTicketMaster()
+    gtm.initialize(n)
+    gtm.reserveMany((userID, rng.randint(1, 10)) for userID in range(1, n + n // 2 + 1))
+    holder = gtm.reservations.seatIndex.holder
+    cancel = gtm.cancel
+    clock = time.perf_counter
+    elapsed = 0
+    for _ in range(n):
+        seatID = rng.randint(1, n)
+        kind = rng.random()
+        if kind < 2 / 3:
+            userID = holder(seatID) or 0
+        elif kind < 5 / 6:
+            userID = rng.randint(1, n)  # most likely the holder of another seat
+        else:
+            userID = -rng.randint(1, n)  # never booked
+        start = clock()
+        cancel(seatID, userID)
+        elapsed += clock() - start
+    print(f"{n} cancels in {elapsed:.2f}s, {n / elapsed:.0f} cancels/sec (validated by one tree search, the seat index is not consulted)")
+
+
+def benchExits(n):
+    """
+    mass exits: n waitlisted users, then 90% of them leave in batches of 10k userIDs, like ReleaseSeats over
+    wide ranges, and the rest are polled. Timed for every waitlist backend.
+    """
+    rng = random.Random(24)
+    users = [(userID, rng.randint(1, 10)) for userID in range(1, n + 1)]
+    leaving = rng.sample(range(1, n + 1), n * 9 // 10)
+    for name, backend in waitlist.WAITLISTS.items():
+        waiting = backend()
+        waiting.pushMany(models.User(userID, priority, userID) for userID, priority in users)
+        start = time.perf_counter()
+        for idx in range(0, len(leaving), 10_000):
+            waiting.removeMany(leaving[idx:idx + 10_000])
+        removed = time.perf_counter() - start
+        left = waiting.size()
+        start = time.perf_counter()
+        while not waiting.isEmpty():
+            waiting.poll()
+        polled = time.perf_counter() - start
+        print(f"{name} : {len(leaving)} exits in {removed:.2f}s, then {left} polls in {polled:.2f}s")
+        del waiting
+        gc.collect()
+
+
+def benchPromote(n):
+    """
+    n / 10 seats booked and n users waitlisted, then AddSeats(n / 2) promotes half of the waitlist at once and
+    ReleaseSeats over a tenth of the userIDs promotes the users after them, both timed.
+    """
+    rng = random.Random(23)
+    seat_count = n // 10
+    gtm = GatorTicketMasterService.GatorTicketMaster()
+    gtm.initialize(seat_count)
+    gtm.reserveMany((userID, rng.randint(1, 10)) for userID in range(1, seat_count + n + 1))
+    start = time.perf_counter()
+    promoted = len(gtm.addSeats(n // 2)) - 1
+    added = time.perf_counter() - start
+    start = time.perf_counter()
+    released = gtm.releaseSeats(1, seat_count + n // 10)
+    elapsed = time.perf_counter() - start
+    print(f"addSeats : {promoted} users promoted in {added:.2f}s, releaseSeats : {len(released) - 1} users promoted in {elapsed:.2f}s")
+
+
+def benchRank(n):
+    """
+    builds an n user waitlist in both waitlist backends, then times 100k rank queries (waitlist positions) and
+    1000 topK(100) on the ranked one. The heap has to count every user for a rank, it is timed on 100 queries only.
+    One at a time pushes and polls are timed too, they are what the ranked backend pays for its queries.
+    """
+    rng = random.Random(20)
+    users = [(userID, rng.randint(1, 10)) for userID in range(1, n + 1)]
+    queries = [rng.randint(1, n) for _ in range(100_000)]
+    for name, backend in waitlist.WAITLISTS.items():
+        start = time.perf_counter()
+        waiting = backend()
+        waiting.pushMany(models.User(userID, priority, userID) for userID, priority in users)
+        built = time.perf_counter() - start
+
+        sample = queries if name == "ranked" else queries[:100]
+        start = time.perf_counter()
+        for userID in sample:
+            waiting.rank(userID)
+        ranked = (time.perf_counter() - start) / len(sample)
+
+        start = time.perf_counter()
+        for _ in range(1000 if name == "ranked" else 10):
+            waiting.topK(100)
+        top = (time.perf_counter() - start) / (1000 if name == "ranked" else 10)
+
+        small = backend()
+        start = time.perf_counter()
+        for userID, priority in users[:100_000]:
+            small.push(models.User(userID, priority, userID))
+        pushed = time.perf_counter() - start
+        start = time.perf_counter()
+        while not small.isEmpty():
+            small.poll()
+        polled = time.perf_counter() - start
+        print(f"{name} : {n} users built in {built:.2f}s, rank {ranked * 1e6:.1f}us ({len(sample)} queries), "
+              f"topK(100) {top * 1e6:.1f}us, 100k push {pushed:.2f}s, poll {polled:.2f}s")
+        del waiting, small
+        gc.collect()
+
+
+def benchInstrumentation(n):
+    """
+    runs the same n calls of reserves, cancels and priority updates on a plain service, on one whose instrumentation
+    was enabled then disabled and on an instrumented one, and prints the overheads and the collected stats.
+    The cost of the wrapper alone is measured on available(), the cheapest call. A last run shows a cProfile hook
+    that only profiles the cancel calls.
+    """
+    rng = random.Random(18)
+    seat_count = n // 4
+    calls = []
+    user = 0  # every reserve is by a new user, the other calls name a user that has reserved
+    for _ in range(n):
+        kind = rng.random()
+        if kind < 0.6 or user == 0:
+            user += 1
+            calls.append(("reserve", (user, rng.randint(1, 10))))
+        elif kind < 0.9:
+            calls.append(("cancel", (rng.randint(1, seat_count), rng.randint(1, user))))
+        else:
+            calls.append(("updatePriority", (rng.randint(1, user), rng.randint(1, 10))))
+
+    def timeCalls(gtm):
+        gtm.initialize(seat_count)
+        methods = {name: getattr(gtm, name) for name in ("reserve", "cancel", "updatePriority")}
+        gc.disable()  # collector pauses over the large heaps vary more between runs than the overhead measured here
+        start = time.perf_counter()
+        for name, args in calls:
+            methods[name](*args)
+        elapsed = time.perf_counter() - start
+        gc.enable()
+        return elapsed
+
+    def perCall(gtm):
+        gtm.initialize(10)
+        available = gtm.available
+        start = time.perf_counter()
+        for _ in range(n):
+            available()
+        return (time.perf_counter() - start) / n
+
+    bare = perCall(GatorTicketMasterService.GatorTicketMaster())
+    gtm = GatorTicketMasterService.GatorTicketMaster()
+    gtm.enableInstrumentation()
+    wrapped = perCall(gtm)
+    print(f"available() : {bare * 1e6:.2f}us plain, {wrapped * 1e6:.2f}us instrumented, {(wrapped - bare) * 1e6:.2f}us per call overhead")
+
+    plain = timeCalls(GatorTicketMasterService.GatorTicketMaster())
+    print(f"plain : {n} calls in {plain:.2f}s")
+    gc.collect()
+
+    gtm = GatorTicketMasterService.GatorTicketMaster()
+    gtm.enableInstrumentation()
+    gtm.disableInstrumentation()
+    disabled = timeCalls(gtm)
+    print(f"disabled : {disabled:.2f}s, {100 * (disabled - plain) / plain:+.1f}%")
+    gc.collect()
+
+    gtm = GatorTicketMasterService.GatorTicketMaster()
+    gtm.enableInstrumentation()
+    enabled = timeCalls(gtm)
+    print(f"enabled : {enabled:.2f}s, {100 * (enabled - plain) / plain:+.1f}%")
+    for line in instrumentation.formatStats(gtm.stats()):
+        print(line)
+    del gtm
+    gc.collect()
+
+    gtm = GatorTicketMasterService.GatorTicketMaster()
+    profiler = cProfile.Profile()
+    gtm.enableInstrumentation().setHook("cancel", profiler)
+    timeCalls(gtm)
+    print("cProfile hooked on cancel only:")
+    pstats.Stats(profiler).sort_stats("tottime").print_stats(5)
+
+
+def runTrace(name, n, seed):
+    """
+    runs one workload trace on an instrumented service and returns its measurements. It is meant to run in a fresh
+    process, so the peak resident memory is the one of this trace only (the interpreter and the trace generator
+    included, the idle process is reported as base_rss_kb).
+    """
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    gtm = GatorTicketMasterService.GatorTicketMaster()
+    gtm.enableInstrumentation()
+    methods = {method: getattr(gtm, method) for method in instrumentation.OPERATIONS}
+    drain = collections.deque(maxlen=0).extend
+    calls = 0
+    start = time.perf_counter()
+    for method, args in workload.trace(name, n, seed):
+        if method == "cancel" and args[1] is workload.HOLDER:
+            holder = gtm.reservations.seatIndex.holder(args[0])
+            args = (args[0], holder if holder is not None else 0)
+        result = methods[method](*args)
+        if method in instrumentation.ITERATORS:
+            drain(result)
+        calls += 1
+    elapsed = time.perf_counter() - start
+    operations = {}
+    for method, summary in gtm.stats()["operations"].items():
+        histogram = gtm.instrumentation.histograms[method]
+        operations[method] = {
+            "count": summary["count"],
+            "ops_per_sec": round(summary["count"] / (histogram.total / 1e9)) if histogram.total else None,
+            "p50_us": summary["p50_us"],
+            "p99_us": summary["p99_us"],
+            "errors": summary["errors"],
+        }
+    return {
+        "trace": name,
+        "scale": n,
+        "seed": seed,
+        "calls": calls,
+        "seconds": round(elapsed, 3),
+        "calls_per_sec": round(calls / elapsed),
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "base_rss_kb": base_rss,
+        "operations": operations,
+        "gauges": instrumentation.gauges(gtm),
+    }
+
+
+def benchSuite(n):
+    """
+    runs every workload trace at the scales 10**4, 10**5, ... up to n calls, each in its own process, and writes
+    one JSON line per run to SUITE_OUTPUT with the per operation throughput and latency and the peak memory.
+    The operation throughput is the one inside the service calls, calls_per_sec also counts the trace generation.
+    """
+    scales = [10 ** exponent for exponent in range(4, int(math.log10(n)) + 1)] or [n]
+    context = multiprocessing.get_context("spawn")
+    with open(SUITE_OUTPUT, "w") as output:
+        for scale in scales:
+            for name in workload.TRACES:
+                with context.Pool(1) as pool:
+                    result = pool.apply(runTrace, (name, scale, 19))
+                output.write(json.dumps(result) + "\n")
+                output.flush()
+                throughput = ", ".join(f"{method} {summary['ops_per_sec']}" for method, summary in result["operations"].items()
+                                       if method != "initialize")
+                print(f"{name} at {scale} : {result['calls_per_sec']} calls/sec, peak {result['peak_rss_kb'] / 1024:.0f} MiB, "
+                      f"ops/sec {throughput}")
+    print(f"results written to {SUITE_OUTPUT}")
+
+
+# name -> (function, default size) of every benchmark
+BENCHMARKS = {
+    "block": (benchBlock, 1_000_000),
+    "cancel": (benchCancel, 1_000_000),
+    "exits": (benchExits, 1_000_000),
+    "instrumentation": (benchInstrumentation, 1_000_000),
+    "memory": (benchMemory, 1_000_000),
+    "mmap": (benchMappedSnapshot, 1_000_000),
+    "promote": (benchPromote, 1_000_000),
+    "rank": (benchRank, 1_000_000),
+    "recovery": (benchRecovery, 10_000_000),
+    "registry": (benchRegistry, 1_000_000),
+    "stress": (benchStress, 10_000_000),
+    "suite": (benchSuite, 10_000_000),
+    "threads": (benchThreads, 1_000_000),
+    "treehealth": (benchTreeHealth, 1_000_000),
+    "waitlist": (benchWaitlist, 1_000_000),
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks for the Gator Ticket Master data structures")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--n", type=int, default=None, help="size of the benchmark, each benchmark has its own default")
+    args = parser.parse_args()
+
+    function, default_n = BENCHMARKS[args.benchmark]
+    function(args.n if args.n is not None else default_n)
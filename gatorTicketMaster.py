@@ -1,141 +1,193 @@
 import sys
+import time
 import GatorTicketMasterService
+import instrumentation
+
+FLUSH_LINES = 8192  # output lines collected in memory before they are written to the output file in one call
+FLAGS = ("--bench", "--stats")  # optional flags accepted after the file name
+
+
+def parseCall(line):
+    """
+    Tokenize one line of the input file like Reserve(12, 3) into the lower cased api name and the raw text of its arguments.
+    The arguments end at the first ')' or the next '(' whichever comes first. A line without '(' has no arguments and None is returned for them.
+    """
+    api, paren, rest = line.partition("(")
+    if not paren:
+        return api.lower(), None
+    return api.lower(), rest.partition("(")[0].partition(")")[0]
+
+
+def oneArg(args):
+    """
+    returns the single argument of a call, stripped for whitespaces.
+    """
+    if args is None:
+        raise IndexError("list index out of range")
+    return args.strip()
+
+
+def twoArgs(args):
+    """
+    returns the first two comma separated arguments of a call, stripped for whitespaces.
+    """
+    if args is None:
+        raise IndexError("list index out of range")
+    apiArgs = args.split(",")
+    return apiArgs[0].strip(), apiArgs[1].strip()
+
+
+def buildDispatch(gtm, emit):
+    """
+    Builds the dispatch table from the lower cased api name to a handler for it. Every handler parses the arguments,
+    calls the bound service method and passes each output line to emit.
+    """
+    initialize, available, reserve, cancel = gtm.initialize, gtm.available, gtm.reserve, gtm.cancel
+    exitWaitlist, updatePriority, addSeats = gtm.exitWaitlist, gtm.updatePriority, gtm.addSeats
+    iterReservations, releaseSeats = gtm.iterReservations, gtm.releaseSeats
+    if gtm.instrumentation is not None:
+        #PrintReservations streams the listing, it is timed as printReservations and not as an iterReservations call
+        iterReservations = gtm.instrumentation.timeIterator("printReservations", iterReservations.__wrapped__)
+
+    def doInitialize(args):
+        seatCount = oneArg(args) #get the initial size of seats heap
+        if not seatCount.isdigit():
+            emit("Invalid input. Please provide a valid number of seats\n")
+        else:
+            emit(initialize(int(seatCount)) + "\n")
+
+    def doAvailable(args):
+        emit(available() + "\n")
+
+    def doReserve(args):
+        userID, userPriority = twoArgs(args)
+        emit(reserve(int(userID), int(userPriority)) + "\n")
+
+    def doCancel(args):
+        seatID, userID = twoArgs(args)
+        for item in cancel(int(seatID), int(userID)):
+            #output for cancellation and rebooking due to waitlist.
+            emit(item + "\n")
+
+    def doExitWaitlist(args):
+        userID = oneArg(args)
+        if not userID.isdigit():
+            emit("Invalid input. Please provide a valid userID\n")
+        else:
+            emit(exitWaitlist(int(userID)) + "\n")
+
+    def doUpdatePriority(args):
+        userID, userPriority = twoArgs(args)
+        emit(updatePriority(int(userID), int(userPriority)) + "\n")
+
+    def doAddSeats(args):
+        count = oneArg(args) #count for seats to be added
+        if not count.isdigit():
+            emit("Invalid input. Please provide a valid number of seats\n")
+        else:
+            #all outputs after increasing the seats, i.e. booking user from waitlist a reservation.
+            for line in addSeats(int(count)):
+                emit(line + "\n")
+
+    def doPrintReservations(args):
+        #stream the bookings in seat order instead of building the whole list first
+        for seatID, userID in iterReservations():
+            emit(f"Seat {seatID}, User {userID}\n")
+
+    def doReleaseSeats(args):
+        userID1, userID2 = twoArgs(args)
+        #check for a valid range
+        if not userID1.isdigit() or not userID2.isdigit() or int(userID1) > int(userID2):
+            emit("Invalid Input. Please provide a valid range of userIDs\n")
+        else:
+            for line in releaseSeats(int(userID1), int(userID2)):
+                emit(line + "\n")
+
+    return {
+        "initialize": doInitialize,
+        "available": doAvailable,
+        "reserve": doReserve,
+        "cancel": doCancel,
+        "exitwaitlist": doExitWaitlist,
+        "updatepriority": doUpdatePriority,
+        "addseats": doAddSeats,
+        "printreservations": doPrintReservations,
+        "releaseseats": doReleaseSeats,
+    }
+
+
+def run(gtm, fileName, bench=False):
+    """
+    Runs every api call of the input file against the service until Quit() or the end of file, and saves the output
+    onto the output file. Output lines are collected and written in large chunks. Returns True if Quit() was read.
+    With bench the number of lines processed per second is printed at the end.
+    """
+    buffer = []
+    dispatch = buildDispatch(gtm, buffer.append)
+    quit = False
+    lines = 0
+    start = time.perf_counter()
+
+    with open(fileName,'r') as f:
+        #open a new file with the name required as per Problem statement
+        with open(f"{fileName[:-4]}_output_file.txt",'w') as out:
+            try:
+                for apiCall in f:
+                    lines += 1
+                    api, args = parseCall(apiCall)
+                    if api == "quit":
+                        buffer.append("Program Terminated!!")
+                        quit = True
+                        break
+                    handler = dispatch.get(api)
+                    if handler is not None:
+                        handler(args)
+                    if len(buffer) >= FLUSH_LINES:
+                        out.write("".join(buffer))
+                        buffer.clear()
+            finally:
+                #whatever was processed before Quit(), the end of file or an error is saved
+                out.write("".join(buffer))
+
+    if bench:
+        elapsed = time.perf_counter() - start
+        print(f"Processed {lines} lines in {elapsed:.3f}s, {lines / elapsed if elapsed > 0 else 0:.0f} lines/sec")
+    return quit
 
 
 if __name__ == "__main__":
     """
     This is the entry point or main function of the application. It takes checks the argument passed along with the makefile,
-    then opens the file with file pointer and iterates over the function calls made in each line. 
-    Each line is split to get actual API name being called and to get the arguments for API if required according to Problem Statement, also stripped for whitespaces.
-    Finally after executing till the EOF of file or untill Quit() is encountered, it saves the output onto a txt file. 
+    then opens the file with file pointer and iterates over the function calls made in each line.
+    Each line is tokenized to get actual API name being called and to get the arguments for API if required according to Problem Statement, also stripped for whitespaces.
+    Finally after executing till the EOF of file or untill Quit() is encountered, it saves the output onto a txt file.
+    Passing --bench after the file name also reports how many lines per second were processed,
+    and --stats prints the call counts, latency percentiles and structure sizes of the service at the end.
     """
 
     gtm = GatorTicketMasterService.GatorTicketMaster() #initialize the ticket service which has all the control functions for each api.
-    
+
     try:
+        flags = [arg for arg in sys.argv[1:] if arg.startswith("--")]
+        fileNames = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
         #check insufficient or bad arguements
-        if len(sys.argv) > 2 or len(sys.argv) == 1:
+        if len(fileNames) != 1 or any(flag not in FLAGS for flag in flags):
             print("Invalid argument provided to code")
 
         else:
-            fileName = sys.argv[1]
+            fileName = fileNames[0]
             print("You provided filename: ",fileName)
             print("Starting Application")
-            with open(sys.argv[1],'r') as f:
-                #open a new file with the name required as per Problem statement
-                with open(f"{fileName[:-4]}_output_file.txt",'w') as out:
-                    for apiCall in f:
-                        apiCall = apiCall.split("(") #get the function from line like, AddSeats(10), splitting on '('
-                        api = apiCall[0].lower()
-
-                        #switch case over the function name from the required 10 functions in Problem Statement
-                        match api:
-                            case "initialize":
-                                apiArg = apiCall[1].split(")")[0].strip() #get the initial size of seats heap
-                                if not apiArg.isdigit():
-                                    #if not a valid integer
-                                    out.write("Invalid input. Please provide a valid number of seats")
-                                else:
-                                    #write output to file
-                                    out.write(gtm.initialize(int(apiArg)))
-                                
-                                out.write("\n")
-
-                            case "available":
-                                out.write(gtm.available())
-                                out.write("\n")
-
-                            case "reserve":
-                                apiCall = apiCall[1].split(")")[0].split(",")
-                                apiArg1 = apiCall[0].strip() #userID
-                                apiArg2 = apiCall[1].strip() #priority
-                                if(apiArg1.isdigit == False or apiArg2.isdigit == False):
-                                    #check for valid integer
-                                    out.write("Invalid Input. Please provide a valid UserID or userPriority")
-                                else:
-                                    out.write(gtm.reserve(int(apiArg1), int(apiArg2)))
-                                
-                                out.write("\n")
-
-                            case "cancel":
-                                apiCall = apiCall[1].split(")")[0].split(",")
-                                apiArg1 = apiCall[0].strip() #seatID
-                                apiArg2 = apiCall[1].strip() #userID
-                                if(apiArg1.isdigit == False or apiArg2.isdigit == False):
-                                    out.write("Invalid Input. Please provide a valid userID or seatID")
-                                    out.write("\n")
-                                else:
-                                    output = gtm.cancel(int(apiArg1), int(apiArg2))
-                                    for item in output:
-                                        #writig output on file for all operations at cancellation and rebooking due to waitlist.
-                                        out.write(item)
-                                        out.write("\n")
-                            
-                            case "exitwaitlist":
-                                apiArg = apiCall[1].split(")")[0].strip() #userID
-                                if not apiArg.isdigit():
-                                    out.write("Invalid input. Please provide a valid userID")
-                                else: 
-                                    out.write(gtm.exitWaitlist(int(apiArg)))      
-
-                                out.write("\n")  
-
-                            case "updatepriority":
-                                apiCall = apiCall[1].split(")")[0].split(",")
-                                apiArg1 = apiCall[0].strip() #userID
-                                apiArg2 = apiCall[1].strip() #new priority
-                                if(apiArg1.isdigit == False or apiArg2.isdigit == False):
-                                    out.write("Invalid Input. Please provide a valid userID or userPriority")
-                                else:
-                                    out.write(gtm.updatePriority(int(apiArg1), int(apiArg2)))
-
-                                out.write("\n")
-
-                            case "addseats":
-                                apiArg = apiCall[1].split(")")[0].strip() #count for seats to be added
-                                if not apiArg.isdigit():
-                                    out.write("Invalid input. Please provide a valid number of seats")
-                                    out.write("\n")
-                                
-                                else:
-                                    output = gtm.addSeats(int(apiArg))
-                                    #adding all outputs after increasing the seats, i.e. booking user from waitlist a reservation.
-                                    for line in output:
-                                        out.write(line)
-                                        out.write("\n")
-
-                            case "printreservations":
-                                output = gtm.printReservations()
-                                for item in output:
-                                    out.write(f"Seat {item[0]}, User {item[1]}")
-                                    out.write("\n")
-
-                            case "releaseseats":
-                                apiCall = apiCall[1].split(")")[0].split(",")
-                                apiArg1 = apiCall[0].strip() #userID1
-                                apiArg2 = apiCall[1].strip() #userID2
-                                #check for a valid range
-                                if(apiArg1.isdigit() == False or apiArg2.isdigit() == False or (apiArg1.isdigit() == True and apiArg2.isdigit() == True and int(apiArg1) > int(apiArg2))):
-                                    out.write("Invalid Input. Please provide a valid range of userIDs")
-                                    out.write("\n")
-                                else:
-                                    output = gtm.releaseSeats(int(apiArg1), int(apiArg2))
-                                    for line in output:
-                                        out.write(line)
-                                        out.write("\n")
-                            
-                            case "quit":
-                                f.close()
-                                out.write("Program Terminated!!")
-                                out.close()
-                                print("Application quiting")
-                                print(f"File saved with output: {fileName[:-4]}_output_file.txt")
-                                sys.exit()
-                            
-                            case "":
-                                pass
-
+            if "--stats" in flags:
+                gtm.enableInstrumentation()
+            quit = run(gtm, fileName, bench="--bench" in flags)
+            if "--stats" in flags:
+                for line in instrumentation.formatStats(gtm.stats()):
+                    print(line)
+            if quit:
+                print("Application quiting")
+                print(f"File saved with output: {fileName[:-4]}_output_file.txt")
+                sys.exit()
 
     except Exception as e:
         print(e)
-
@@ -0,0 +1,243 @@
+import time
+
+# public GatorTicketMaster methods that are timed when instrumentation is enabled
+OPERATIONS = ("initialize", "available", "reserve", "reserveMany", "reserveBlock", "cancel", "search", "whoHolds",
+              "waitlistPosition", "waitlistTop", "exitWaitlist", "updatePriority", "addSeats", "printReservations",
+              "iterReservations", "releaseSeats")
+# methods returning an iterator, their latency is the time spent in the call and in producing the items, not in the consumer
+ITERATORS = ("iterReservations",)
+
+SUB_BITS = 5  # every power of two is split in 2**SUB_BITS linear buckets, values are kept within ~3%
+SUB_BUCKETS = 1 << SUB_BITS
+
+
+class LatencyHistogram:
+    """
+    HDR style histogram of latencies in nanoseconds. Buckets are log-linear: exact below 2**SUB_BITS, above it every
+    power of two range is split into SUB_BUCKETS equal buckets, so the relative error is the same for 1us and 1s
+    and recording is a few integer operations. Percentiles are reported as the upper bound of their bucket.
+    """
+    def __init__(self) -> None:
+        self.counts = [0] * (64 * SUB_BUCKETS)
+        self.total = 0
+        self.max = 0
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    @staticmethod
+    def bucketOf(value) -> int:
+        if value < SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - SUB_BITS
+        return shift * SUB_BUCKETS + (value >> (shift - 1)) - SUB_BUCKETS
+
+    @staticmethod
+    def upperBound(bucket) -> int:
+        """
+        largest value that falls into the bucket.
+        """
+        if bucket < 2 * SUB_BUCKETS:
+            return bucket
+        shift, offset = divmod(bucket, SUB_BUCKETS)
+        return ((offset + SUB_BUCKETS + 1) << (shift - 1)) - 1
+
+    def record(self, value) -> None:
+        # bucketOf inlined, this runs on every instrumented call
+        if value < SUB_BUCKETS:
+            self.counts[value] += 1
+        else:
+            shift = value.bit_length() - SUB_BITS
+            self.counts[shift * SUB_BUCKETS + (value >> (shift - 1)) - SUB_BUCKETS] += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p) -> int:
+        """
+        returns the latency below which p percent of the recorded values fall.
+        """
+        count = self.count
+        if count == 0:
+            return 0
+        target = max(1, -(-count * p // 100))  # rank of the value, rounded up
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self.upperBound(bucket), self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        """
+        count and latencies in microseconds: mean, p50, p90, p99, p99.9 and max.
+        """
+        count = self.count
+        if count == 0:
+            return {"count": 0}
+        return {
+            "count": count,
+            "mean_us": self.total / count / 1000,
+            "p50_us": self.percentile(50) / 1000,
+            "p90_us": self.percentile(90) / 1000,
+            "p99_us": self.percentile(99) / 1000,
+            "p999_us": self.percentile(99.9) / 1000,
+            "max_us": self.max / 1000,
+        }
+
+
+class Instrumentation:
+    """
+    Opt-in instrumentation of one GatorTicketMaster. attach replaces the public methods of that instance with timed
+    wrappers that count calls and errors and record the latency of each operation. Nothing is wrapped until attach
+    is called and detach restores the plain methods, so a service that is not instrumented runs the exact same code.
+
+    A profiler can be targeted at a single operation type with setHook: the hook is anything with enable() and
+    disable(), like cProfile.Profile, and it is enabled only around the calls of that operation.
+    """
+    def __init__(self) -> None:
+        self.histograms = {name: LatencyHistogram() for name in OPERATIONS}
+        self.errors = dict.fromkeys(OPERATIONS, 0)
+        self.hooks = {}
+        self.gtm = None
+
+    def attach(self, gtm) -> None:
+        self.gtm = gtm
+        for name in OPERATIONS:
+            setattr(gtm, name, self.wrap(name, getattr(gtm, name)))
+
+    def detach(self) -> None:
+        for name in OPERATIONS:
+            self.gtm.__dict__.pop(name, None)  # the class method is visible again
+
+    def setHook(self, name, hook) -> None:
+        """
+        enable hook around every call of the operation name, None removes it.
+        """
+        if name not in self.histograms:
+            raise ValueError(f"Unknown operation {name}, choose from {', '.join(OPERATIONS)}")
+        if hook is None:
+            self.hooks.pop(name, None)
+        else:
+            self.hooks[name] = hook
+
+    def wrap(self, name, method):
+        record = self.histograms[name].record
+        hooks = self.hooks
+        clock = time.perf_counter_ns
+
+        if name in ITERATORS:
+            return self.timeIterator(name, method)
+
+        def timed(*args, **kwargs):
+            if hooks:
+                return hooked(*args, **kwargs)
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            except Exception:
+                self.errors[name] += 1
+                raise
+            finally:
+                record(clock() - start)
+
+        def hooked(*args, **kwargs):
+            hook = hooks.get(name)
+            if hook is not None:
+                hook.enable()
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            except Exception:
+                self.errors[name] += 1
+                raise
+            finally:
+                record(clock() - start)
+                if hook is not None:
+                    hook.disable()
+
+        timed.__wrapped__ = method
+        return timed
+
+    def timeIterator(self, name, method):
+        """
+        returns a timed wrapper of a method returning an iterator. Only the call and every next() on the iterator are
+        timed, the time the caller spends on each item is not, and the total is recorded once under name when the
+        iterator is exhausted or closed.
+        """
+        record = self.histograms[name].record
+        hooks = self.hooks
+        clock = time.perf_counter_ns
+
+        def timedIterator(*args, **kwargs):
+            hook = hooks.get(name)
+            elapsed = 0
+            try:
+                if hook is not None:
+                    hook.enable()
+                start = clock()
+                try:
+                    iterator = iter(method(*args, **kwargs))
+                finally:
+                    elapsed += clock() - start
+                    if hook is not None:
+                        hook.disable()
+                while True:
+                    if hook is not None:
+                        hook.enable()
+                    start = clock()
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        break
+                    finally:
+                        elapsed += clock() - start
+                        if hook is not None:
+                            hook.disable()
+                    yield item
+            except Exception:
+                self.errors[name] += 1
+                raise
+            finally:
+                record(elapsed)
+
+        timedIterator.__wrapped__ = method
+        return timedIterator
+
+    def stats(self) -> dict:
+        """
+        counters and latency summaries of every operation that was called, plus the current structure sizes.
+        """
+        operations = {}
+        for name, histogram in self.histograms.items():
+            if histogram.count:
+                operations[name] = dict(histogram.summary(), errors=self.errors[name])
+        return {"operations": operations, "gauges": gauges(self.gtm)}
+
+
+def gauges(gtm) -> dict:
+    """
+    current sizes of the structures of a service: free seats, waitlisted users and reservation tree nodes.
+    """
+    if gtm.mapped is not None:
+        return {"seats": gtm.mapped.freeSeats, "waitlist": gtm.mapped.waitlistSize, "reservations": len(gtm.mapped.keys)}
+    return {
+        "seats": gtm.seats.size() if gtm.seats is not None else 0,
+        "waitlist": gtm.waitlist.size() if gtm.waitlist is not None else 0,
+        "reservations": gtm.reservations.size(),
+    }
+
+
+def formatStats(stats) -> list:
+    """
+    lines of a human readable report of stats(), one per operation and one for the gauges.
+    """
+    lines = []
+    for name, summary in stats.get("operations", {}).items():
+        lines.append(f"{name:<18} count {summary['count']:>9}  errors {summary['errors']:>5}  mean {summary['mean_us']:>9.2f}us  "
+                     f"p50 {summary['p50_us']:>9.2f}us  p99 {summary['p99_us']:>9.2f}us  p99.9 {summary['p999_us']:>9.2f}us  "
+                     f"max {summary['max_us']:>9.2f}us")
+    gauge = stats["gauges"]
+    lines.append(f"seats available {gauge['seats']}, waitlist {gauge['waitlist']}, reservations {gauge['reservations']}")
+    return lines
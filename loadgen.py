@@ -0,0 +1,98 @@
+"""
+Load generator for server.py. Opens a number of connections, each on its own event, and sends a mix of Reserve,
+Cancel, UpdatePriority and Available commands with up to --pipeline requests in flight per connection.
+Reports the p50 and p99 latency of a request, from sending it to reading the end of its answer, and the ops/sec.
+    python3 server.py &
+    python3 loadgen.py --connections 8 --requests 20000 --pipeline 32
+"""
+import argparse
+import asyncio
+import random
+import time
+
+
+async def readAnswer(reader) -> list:
+    """
+    reads the lines of one answer, up to the empty line that ends it.
+    """
+    lines = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        if line == b"\n":
+            return lines
+        lines.append(line.decode().rstrip("\n"))
+
+
+def commands(rng, requests, seats):
+    """
+    yields the workload of one connection after its Initialize. Every Reserve is by a new user, a user reserves only
+    once like in the input files, and Cancel and UpdatePriority name one of the users that have reserved.
+    """
+    userID = 0
+    for _ in range(requests):
+        kind = rng.random()
+        if kind < 0.5 or userID == 0:
+            userID += 1
+            yield f"Reserve({userID}, {rng.randint(1, 10)})"
+        elif kind < 0.7:
+            yield f"Cancel({rng.randint(1, seats)}, {rng.randint(1, userID)})"
+        elif kind < 0.8:
+            yield f"UpdatePriority({rng.randint(1, userID)}, {rng.randint(1, 10)})"
+        else:
+            yield "Available()"
+
+
+async def client(host, port, eventID, requests, pipeline, seats, latencies) -> None:
+    """
+    one connection: selects its event, initializes it, then keeps up to pipeline requests in flight.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    rng = random.Random(eventID)
+    writer.write(f"Event({eventID})\nInitialize({seats})\n".encode())
+    await readAnswer(reader)
+    await readAnswer(reader)
+
+    sent = asyncio.Queue(pipeline)  # send times of the requests in flight, the queue bound is the pipeline depth
+
+    async def receive():
+        for _ in range(requests):
+            await readAnswer(reader)
+            latencies.append(time.perf_counter() - await sent.get())
+
+    receiver = asyncio.get_running_loop().create_task(receive())
+    for command in commands(rng, requests, seats):
+        await sent.put(time.perf_counter())
+        writer.write(command.encode() + b"\n")
+        if sent.full():
+            await writer.drain()
+    await writer.drain()
+    await receiver
+    writer.write(b"Quit()\n")
+    await readAnswer(reader)
+    writer.close()
+
+
+async def main(host, port, connections, requests, pipeline, seats) -> None:
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, eventID, requests, pipeline, seats, latencies) for eventID in range(1, connections + 1)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)]
+    print(f"{len(latencies)} requests over {connections} connections, pipeline {pipeline} : {len(latencies) / elapsed:.0f} ops/sec, "
+          f"p50 {p50 * 1000:.2f}ms, p99 {p99 * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load generator for the Gator Ticket Master TCP server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7070)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=20_000, help="requests per connection")
+    parser.add_argument("--pipeline", type=int, default=32, help="requests in flight per connection")
+    parser.add_argument("--seats", type=int, default=1000, help="seats of every event")
+    args = parser.parse_args()
+    asyncio.run(main(args.host, args.port, args.connections, args.requests, args.pipeline, args.seats))
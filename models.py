@@ -1,13 +1,27 @@
-import time
+# node colours of the Red Black Tree, stored as small ints instead of strings
+RED = 0
+BLACK = 1
+
+SEQ_BITS = 40  # low bits of a waitlist key hold the sequence number, enough for 10^12 users
+
+def packKey(priority, seq) -> int:
+    """
+    packs a priority and a sequence number into one int, smaller keys are served first: higher priority first,
+    then the lower sequence number (first come first served) among equal priorities.
+    """
+    return (-priority << SEQ_BITS) | seq
 
 class User:
     """
-    class to define a User node
+    class to define a User node. seq is the position of the user in the order of arrival, given by the service.
     """
-    def __init__(self, userID, priority) -> None:
+    __slots__ = ("userID", "priority", "seq", "key")  # no per instance __dict__, waitlists can hold millions of users
+
+    def __init__(self, userID, priority, seq) -> None:
         self.userID = userID
         self.priority = priority
-        self.timeStamp = time.time() # to be used for resolving ties on basis of priority
+        self.seq = seq # to be used for resolving ties on basis of priority, kept when the priority changes
+        self.key = packKey(priority, seq) # the only value the waitlist heap compares
 
 
 
@@ -15,10 +29,12 @@ class Booking:
     """
     Class to create a node for any booking done for reservation. It is a Red Black Tree node
     """
+    __slots__ = ("userID", "seatID", "left", "right", "parent", "color")  # no per instance __dict__, one node per reservation
+
     def __init__(self, userID: int, seatID: int) -> None:
         self.userID = userID
         self.seatID = seatID
         self.left = None
         self.right = None
         self.parent = None
-        self.color = 'R' # new node inserted are always Red in beginning
\ No newline at end of file
+        self.color = RED # new node inserted are always Red in beginning
@@ -0,0 +1,298 @@
+import os
+import struct
+import zlib
+
+import GatorTicketMasterService
+import snapshot
+
+# operations that change the state of the service, with their code in the log and their number of integer arguments
+OPERATIONS = {
+    "initialize": (1, 1),
+    "reserve": (2, 2),
+    "cancel": (3, 2),
+    "exitWaitlist": (4, 1),
+    "updatePriority": (5, 2),
+    "addSeats": (6, 1),
+    "releaseSeats": (7, 2),
+    "reserveBlock": (8, 2),  # one record per user of the block: (userID, k), the k records of a block are consecutive
+}
+OPERATION_NAMES = {code: (name, arity) for name, (code, arity) in OPERATIONS.items()}
+
+WAL_FILE = "wal.log"
+SNAPSHOT_FILE = "snapshot.bin"
+
+WAL_HEADER = struct.Struct("<4sq")  # magic, number of operations applied before the first record of this log
+WAL_RECORD = struct.Struct("<BqqI")  # operation code, two integer arguments, crc32 of the first three fields
+WAL_MAGIC = b"GTMW"
+
+
+class WriteAheadLog:
+    """
+    Append-only log of the operations applied to the service. Records are fixed size and carry a crc32, so a torn
+    record at the end of the file after a crash is detected and dropped. Records are committed in groups: they are
+    buffered and written with a single fsync once groupSize of them are pending, or when commit is called.
+    """
+    def __init__(self, path, base=0, groupSize=1000) -> None:
+        """
+        opens the log at path for appending, creating it with the given base if it does not exist yet.
+        base is the number of operations applied before the first record of the log.
+        """
+        self.path = path
+        self.groupSize = groupSize
+        self.pending = bytearray()  # encoded records not yet written
+        self.pendingCount = 0
+        if not os.path.exists(path):
+            self.create(path, base)
+        self.base, records, valid_end = self.read(path)
+        self.count = len(records)  # records in the log, including the pending ones
+        self.file = open(path, "r+b")
+        self.file.truncate(valid_end)  # drop a torn tail before appending after it
+        self.file.seek(valid_end)
+
+    @staticmethod
+    def create(path, base) -> None:
+        """
+        atomically creates an empty log whose first record will be operation number base + 1.
+        """
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(WAL_HEADER.pack(WAL_MAGIC, base))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        snapshot.syncDirectory(os.path.dirname(os.path.abspath(path)))
+
+    @staticmethod
+    def read(path):
+        """
+        reads a log and returns its base, the list of (code, arg1, arg2) records and the offset where valid records end.
+        Reading stops at the first incomplete or corrupted record, a block booking cut short by it is dropped as a whole.
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, base = WAL_HEADER.unpack_from(data, 0)
+        if magic != WAL_MAGIC:
+            raise ValueError(f"{path} is not a write-ahead log")
+        records = []
+        offset = WAL_HEADER.size
+        block_left = 0  # records still expected in the current block booking
+        block_offset = block_index = 0
+        block_code = OPERATIONS["reserveBlock"][0]
+        while offset + WAL_RECORD.size <= len(data):
+            code, arg1, arg2, crc = WAL_RECORD.unpack_from(data, offset)
+            if zlib.crc32(data[offset:offset + WAL_RECORD.size - 4]) != crc:
+                break
+            if code == block_code and block_left == 0:
+                block_left, block_offset, block_index = arg2, offset, len(records)
+            elif (code == block_code) != (block_left > 0):
+                break
+            if code == block_code:
+                block_left -= 1
+            records.append((code, arg1, arg2))
+            offset += WAL_RECORD.size
+        if block_left > 0:
+            del records[block_index:]
+            offset = block_offset
+        return base, records, offset
+
+    def append(self, name, *args) -> None:
+        """
+        add one operation to the log, the group is committed once it is full.
+        """
+        code, _ = OPERATIONS[name]
+        arg1 = args[0] if len(args) > 0 else 0
+        arg2 = args[1] if len(args) > 1 else 0
+        body = struct.pack("<Bqq", code, arg1, arg2)
+        self.pending += body
+        self.pending += struct.pack("<I", zlib.crc32(body))
+        self.pendingCount += 1
+        self.count += 1
+        if self.pendingCount >= self.groupSize:
+            self.commit()
+
+    def commit(self) -> None:
+        """
+        write all the pending records and make them durable with one fsync.
+        """
+        if not self.pending:
+            return
+        self.file.write(self.pending)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending.clear()
+        self.pendingCount = 0
+
+    def close(self) -> None:
+        """
+        commit what is pending and close the file.
+        """
+        self.commit()
+        self.file.close()
+
+
+def replay(gtm, records) -> None:
+    """
+    Applies logged operations to the service. An operation that failed when it was first applied fails the same way
+    again, without changing the state, so errors are skipped.
+    """
+    records = list(records)  # a block is read ahead by index, any iterable of records is accepted
+    block_code = OPERATIONS["reserveBlock"][0]
+    idx = 0
+    while idx < len(records):
+        code, arg1, arg2 = records[idx]
+        name, arity = OPERATION_NAMES[code]
+        if code == block_code:
+            args = ([record[1] for record in records[idx:idx + arg2]], arg2)  # the block is the next k records
+            idx += arg2
+        else:
+            args = (arg1, arg2)[:arity]
+            idx += 1
+        try:
+            getattr(gtm, name)(*args)
+        except Exception:
+            pass
+
+
+def recover(directory, **options):
+    """
+    Rebuilds the service stored in directory: loads the latest snapshot and replays only the log records after it.
+    options are passed to the GatorTicketMaster constructor. Returns the service and the number of operations applied.
+    """
+    gtm = GatorTicketMasterService.GatorTicketMaster(**options)
+    applied = 0
+    snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+    if os.path.exists(snapshot_path):
+        applied = snapshot.load(gtm, snapshot_path)
+
+    wal_path = os.path.join(directory, WAL_FILE)
+    if os.path.exists(wal_path):
+        base, records, _ = WriteAheadLog.read(wal_path)
+        # a crash between writing a snapshot and rotating the log leaves records the snapshot already covers
+        tail = records[max(applied - base, 0):]
+        replay(gtm, tail)
+        applied = max(applied, base) + len(tail)
+    return gtm, applied
+
+
+class DurableTicketMaster:
+    """
+    GatorTicketMaster whose state survives a restart. Every operation that changes the state is appended to the
+    write-ahead log before it is applied, and every snapshotEvery operations a snapshot of the three structures is
+    written and the log is started again empty. Opening the same directory again recovers the state from the
+    latest snapshot plus the log tail. Read only operations are passed straight to the service.
+    """
+    def __init__(self, directory, snapshotEvery=1_000_000, groupSize=1000, **options) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.snapshotEvery = snapshotEvery
+        self.groupSize = groupSize
+        self.gtm, self.applied = recover(directory, **options)
+        self.wal = WriteAheadLog(os.path.join(directory, WAL_FILE), self.applied, groupSize)
+        self.sinceSnapshot = self.wal.count
+
+    def __getattr__(self, name):
+        return getattr(self.gtm, name)
+
+    def log(self, name, *args) -> None:
+        """
+        append one operation to the log and take a snapshot when enough operations were logged since the last one.
+        """
+        self.wal.append(name, *args)
+        self.applied += 1
+        self.sinceSnapshot += 1
+
+    def afterApply(self) -> None:
+        if self.snapshotEvery and self.sinceSnapshot >= self.snapshotEvery:
+            self.snapshot()
+
+    def initialize(self, seatCount):
+        self.log("initialize", seatCount)
+        try:
+            return self.gtm.initialize(seatCount)
+        finally:
+            self.afterApply()
+
+    def reserve(self, userID, userPriority):
+        self.log("reserve", userID, userPriority)
+        try:
+            return self.gtm.reserve(userID, userPriority)
+        finally:
+            self.afterApply()
+
+    def reserveMany(self, users):
+        users = list(users)
+        for userID, userPriority in users:
+            self.log("reserve", userID, userPriority) # logged one by one, replaying them gives the same state
+        try:
+            return self.gtm.reserveMany(users)
+        finally:
+            self.afterApply()
+
+    def reserveBlock(self, userIDs, k):
+        userIDs = list(userIDs)
+        if len(userIDs) != k:
+            return self.gtm.reserveBlock(userIDs, k) # rejected without a change, nothing to log
+        for userID in userIDs:
+            self.log("reserveBlock", userID, k)
+        try:
+            return self.gtm.reserveBlock(userIDs, k)
+        finally:
+            self.afterApply()
+
+    def cancel(self, seatID, userID):
+        self.log("cancel", seatID, userID)
+        try:
+            return self.gtm.cancel(seatID, userID)
+        finally:
+            self.afterApply()
+
+    def exitWaitlist(self, userID):
+        self.log("exitWaitlist", userID)
+        try:
+            return self.gtm.exitWaitlist(userID)
+        finally:
+            self.afterApply()
+
+    def updatePriority(self, userID, userPriority):
+        self.log("updatePriority", userID, userPriority)
+        try:
+            return self.gtm.updatePriority(userID, userPriority)
+        finally:
+            self.afterApply()
+
+    def addSeats(self, count):
+        self.log("addSeats", count)
+        try:
+            return self.gtm.addSeats(count)
+        finally:
+            self.afterApply()
+
+    def releaseSeats(self, userID1, userID2):
+        self.log("releaseSeats", userID1, userID2)
+        try:
+            return self.gtm.releaseSeats(userID1, userID2)
+        finally:
+            self.afterApply()
+
+    def commit(self) -> None:
+        """
+        make every logged operation durable now instead of waiting for the group to fill up.
+        """
+        self.wal.commit()
+
+    def snapshot(self) -> None:
+        """
+        write a snapshot of the current state and start a new empty log after it.
+        """
+        self.wal.commit()
+        snapshot.write(self.gtm, os.path.join(self.directory, SNAPSHOT_FILE), self.applied)
+        self.wal.close()
+        WriteAheadLog.create(os.path.join(self.directory, WAL_FILE), self.applied)
+        self.wal = WriteAheadLog(os.path.join(self.directory, WAL_FILE), self.applied, self.groupSize)
+        self.sinceSnapshot = 0
+
+    def close(self) -> None:
+        """
+        commit the log and close it.
+        """
+        self.wal.close()
@@ -0,0 +1,222 @@
+import multiprocessing
+import pickle
+import zlib
+from collections.abc import Iterator
+
+import GatorTicketMasterService
+
+
+def serveEvents(connection, options) -> None:
+    """
+    Main loop of a worker process. It owns one GatorTicketMaster per eventID routed to it, created on first use
+    with the given constructor options. Every message is a batch of (eventID, method, args) calls, they are applied
+    in order and one reply with a (True, result) or (False, exception) for each call is sent back. None stops the worker.
+    Iterators, such as the one of iterReservations, are sent back as lists.
+    """
+    events = {}
+    while True:
+        batch = connection.recv()
+        if batch is None:
+            break
+        replies = []
+        for eventID, method, args in batch:
+            gtm = events.get(eventID)
+            if gtm is None:
+                gtm = events[eventID] = GatorTicketMasterService.GatorTicketMaster(**options)
+            try:
+                result = getattr(gtm, method)(*args)
+                if isinstance(result, Iterator):
+                    result = list(result)
+                replies.append((True, result))
+            except Exception as e:
+                replies.append((False, e))
+        try:
+            connection.send(replies)
+        except Exception:
+            #a result or exception can't be pickled, the batch is pickled before anything is written so the pipe is intact
+            connection.send([picklable(reply, method) for reply, (_, method, _) in zip(replies, batch)])
+    connection.close()
+
+
+def picklable(reply, method):
+    """
+    returns the reply if it can be pickled, or else a (False, TypeError) saying why, so that the worker survives it.
+    """
+    try:
+        pickle.dumps(reply)
+        return reply
+    except Exception as e:
+        return (False, TypeError(f"Reply of {method} can't be sent back from the worker: {e!r}"))
+
+
+def workerOf(eventID, workers) -> int:
+    """
+    returns the worker that owns an event. Integer eventIDs are taken modulo the number of workers, other ids use
+    crc32 which is stable across processes and runs, unlike hash() of a string.
+    """
+    if isinstance(eventID, int):
+        return eventID % workers
+    return zlib.crc32(str(eventID).encode()) % workers
+
+
+class Reply:
+    """
+    Result of a submitted call, filled in when the reply of its batch is received. A lighter stand in for
+    concurrent.futures.Future, which costs more to create than most calls take to run.
+    """
+    __slots__ = ("registry", "done", "ok", "value")
+
+    def __init__(self, registry) -> None:
+        self.registry = registry
+        self.done = False
+        self.ok = False
+        self.value = None
+
+    def result(self):
+        """
+        returns the result of the call, flushing the registry first if it was not answered yet.
+        The exception raised by the call is raised again here.
+        """
+        if not self.done:
+            self.registry.flush()
+        if not self.ok:
+            raise self.value
+        return self.value
+
+
+class EventRegistry:
+    """
+    Front-end for many independent events, each one a GatorTicketMaster keyed by eventID. Events are sharded over
+    worker processes by a stable hash of the eventID, so every call of an event runs in the same process.
+
+    submit queues a call and returns a Reply for its result. Queued calls are sent to their worker in batches of
+    batchSize, with one pipe message per batch, and a worker applies a batch in order, so the calls of an event are
+    applied in the order they were submitted. flush sends what is still queued and waits for every reply.
+    A worker has at most one batch in flight, the reply of the previous batch is collected before the next is sent.
+    If a worker process dies, its events are lost: every call waiting on it fails, and so does every later call routed
+    to it, with a RuntimeError naming the worker.
+    """
+    def __init__(self, workers=4, batchSize=1000, **options) -> None:
+        """
+        starts the worker processes. options are passed to the GatorTicketMaster constructor of every event.
+        """
+        self.workers = workers
+        self.batchSize = batchSize
+        self.connections = []
+        self.processes = []
+        for _ in range(workers):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=serveEvents, args=(child, options), daemon=True)
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+        self.queued = [[] for _ in range(workers)]  # calls not sent yet
+        self.queuedReplies = [[] for _ in range(workers)]
+        self.inFlight = [None] * workers  # replies of the batch sent and not answered yet
+
+    def submit(self, eventID, method, *args) -> Reply:
+        """
+        queue a call of a GatorTicketMaster method on an event, for example submit(7, "reserve", 12, 3).
+        """
+        worker = workerOf(eventID, self.workers)
+        reply = Reply(self)
+        queued = self.queued[worker]
+        queued.append((eventID, method, args))
+        self.queuedReplies[worker].append(reply)
+        if len(queued) >= self.batchSize:
+            self.send(worker)
+        return reply
+
+    def call(self, eventID, method, *args):
+        """
+        run one call and wait for its result, everything queued before it is sent too.
+        """
+        return self.submit(eventID, method, *args).result()
+
+    def send(self, worker) -> None:
+        """
+        send the queued calls of a worker as one batch, after collecting the reply of its previous batch.
+        """
+        self.receive(worker)
+        batch, replies = self.queued[worker], self.queuedReplies[worker]
+        self.queued[worker] = []
+        self.queuedReplies[worker] = []
+        try:
+            self.connections[worker].send(batch)
+        except OSError:
+            self.fail(worker, replies)
+        self.inFlight[worker] = replies
+
+    def receive(self, worker) -> None:
+        """
+        wait for the reply of the batch in flight on a worker, if any, and fill in its replies.
+        """
+        replies = self.inFlight[worker]
+        if replies is None:
+            return
+        self.inFlight[worker] = None
+        try:
+            results = self.connections[worker].recv()
+        except (EOFError, OSError):
+            self.fail(worker, replies)
+        for reply, (ok, value) in zip(replies, results):
+            reply.done = True
+            reply.ok = ok
+            reply.value = value
+
+    def fail(self, worker, replies) -> None:
+        """
+        the pipe of a worker is broken, its process has died. Fails the given replies with a RuntimeError and raises it.
+        """
+        process = self.processes[worker]
+        process.join(1)
+        error = RuntimeError(f"Worker {worker} of the event registry has died (exit code {process.exitcode}), "
+                             f"the calls of its events are lost")
+        for reply in replies:
+            reply.done = True
+            reply.ok = False
+            reply.value = error
+        raise error
+
+    def flush(self) -> None:
+        """
+        send every queued call and wait until all of them are answered. The other workers are still answered when
+        one has died, the RuntimeError of the first dead worker is raised at the end.
+        """
+        error = None
+        for worker in range(self.workers):
+            try:
+                if self.queued[worker]:
+                    self.send(worker)
+            except RuntimeError as e:
+                error = error or e
+        for worker in range(self.workers):
+            try:
+                self.receive(worker)
+            except RuntimeError as e:
+                error = error or e
+        if error is not None:
+            raise error
+
+    def close(self) -> None:
+        """
+        answer everything still queued, then stop the workers. The workers are stopped even if one of them has died.
+        """
+        try:
+            self.flush()
+        finally:
+            for connection, process in zip(self.connections, self.processes):
+                if process.is_alive():
+                    try:
+                        connection.send(None)
+                    except OSError:
+                        pass
+                process.join()
+                connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
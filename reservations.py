@@ -1,10 +1,80 @@
-from models import Booking
+from array import array
+
+from models import Booking, RED, BLACK
+
+NO_OWNER = -1 << 63  # smallest int64, marks a seat without a reservation in the seat index
+INT64_MIN, INT64_MAX = -1 << 63, (1 << 63) - 1  # range of the userIDs the array engine can store
+
+class SeatIndex:
+    """
+    Secondary index of the reservations keyed by seat number. It is a dense array('q') indexed by seatID which
+    holds the userID of the seat owner, or NO_OWNER if the seat is not reserved. It answers who holds a seat in O(1)
+    with 8 bytes per seat, and walking it from the start gives the bookings in seat order without any sorting.
+    A userID that does not fit in an int64 turns the array into a plain list, which holds any userID.
+    """
+    def __init__(self) -> None:
+        self.owner = array("q", [NO_OWNER])  # index 0 is unused, seat numbers start from 1
+        self.count = 0  # number of reserved seats
+
+    def grow(self, max_seat) -> None:
+        """
+        make room for the seats up to max_seat, called by assign when a seat is beyond the current end.
+        """
+        if max_seat >= len(self.owner):
+            self.owner.extend(array("q", [NO_OWNER]) * (max_seat + 1 - len(self.owner)))
+
+    def assign(self, seatID, userID) -> None:
+        """
+        record that the seat is held by the user, grows the array if the seat is beyond the current end.
+        """
+        if seatID >= len(self.owner):
+            self.grow(seatID)
+        previous = self.owner[seatID]
+        try:
+            self.owner[seatID] = userID
+        except (OverflowError, TypeError):
+            self.owner = list(self.owner)  # object backed from here on, the seat is already taken from the allocator
+            self.owner[seatID] = userID
+        if previous == NO_OWNER:
+            self.count += 1
+
+    def release(self, seatID) -> None:
+        """
+        mark the seat as not reserved anymore.
+        """
+        if self.owner[seatID] != NO_OWNER:
+            self.count -= 1
+        self.owner[seatID] = NO_OWNER
+
+    def holder(self, seatID):
+        """
+        returns the userID holding the seat, or None if it is not reserved or does not exist.
+        """
+        if 0 < seatID < len(self.owner):
+            userID = self.owner[seatID]
+            if userID != NO_OWNER:
+                return userID
+        return None
+
+    def items(self, start_seat=1):
+        """
+        yields (seatID, userID) for every reserved seat in increasing order of seatID, starting from start_seat.
+        """
+        owner = self.owner
+        for seatID in range(max(start_seat, 1), len(owner)):
+            userID = owner[seatID]
+            if userID != NO_OWNER:
+                yield seatID, userID
+
 
 class RedBlackTree:
     def __init__(self) -> None:
         self.leaf = Booking(0, 0)  #node for null leaves
-        self.leaf.color = 'B'  # leaves are always Black
+        self.leaf.color = BLACK  # leaves are always Black
         self.root = self.leaf
+        self.seatIndex = SeatIndex()  # seat ordered view of the same bookings, updated along with the tree
+        self.rotations = 0  # health counters, number of rotations and recolourings done while rebalancing
+        self.recolorings = 0
 
 
     def rotateLeft(self, x) -> None:
@@ -14,12 +84,13 @@ class RedBlackTree:
         This operation changes the tree structure by rotating node x to the left.
         It is used to maintain the Red-Black Tree properties during insertion and deletion.
         """
+        self.rotations += 1
         y = x.right
         x.right = y.left
         if y.left != self.leaf:
             y.left.parent = x
         y.parent = x.parent
-        if x.parent == self.leaf:
+        if x.parent == None:
             self.root = y # If x is the root, y becomes the new root
         elif x == x.parent.left:
             x.parent.left = y # Make y the left child of x's parent
@@ -36,12 +107,13 @@ class RedBlackTree:
         This operation changes the tree structure by rotating node x to the right.
         It is used to maintain the Red-Black Tree properties during insertion and deletion.
         """
+        self.rotations += 1
         y = x.left
         x.left = y.right
         if y.right != self.leaf:
             y.right.parent = x
         y.parent = x.parent
-        if x.parent == self.leaf:
+        if x.parent == None:
             self.root = y  # If x is the root, y becomes the new root
         elif x == x.parent.right:
             x.parent.right = y  # Make y the right child of x's parent
@@ -57,15 +129,13 @@ class RedBlackTree:
         
         This function performs a binary search in the tree. It returns the node 
         if found, or None if the userID does not exist in the tree.
+        It walks down with a loop, so the depth of the tree is not limited by the recursion limit.
         """
-        if node == self.leaf:  
-            return None
-        elif node.userID == user_id: #match found
-            return node
-        elif user_id < node.userID:
-            return self.search(node.left, user_id)
-        else:
-            return self.search(node.right, user_id)
+        while node != self.leaf:
+            if node.userID == user_id: #match found
+                return node
+            node = node.left if user_id < node.userID else node.right
+        return None
         
 
     def addReservationHelper(self, k) -> None:
@@ -75,38 +145,42 @@ class RedBlackTree:
         This function ensures that the tree maintains its Red-Black properties
         after the insertion by performing rotations and recoloring as necessary.
         """
-        while k != self.root and k.parent.color == "red":
+        while k != self.root and k.parent.color == RED:
             if k.parent == k.parent.parent.left:
                 u = k.parent.parent.right  # uncle
-                if u.color == "R":  # Case 1: Uncle is red
-                    u.color = "B"
-                    k.parent.color = "B"
-                    k.parent.parent.color = "R"
+                if u.color == RED:  # Case 1: Uncle is red
+                    self.recolorings += 3
+                    u.color = BLACK
+                    k.parent.color = BLACK
+                    k.parent.parent.color = RED
                     k = k.parent.parent
                 else: # Case 2: Uncle is black
                     if k == k.parent.right: # Case 2a: k is a right child
                         k = k.parent
                         self.rotateLeft(k)
-                    k.parent.color = "B"  # Recolor parent to black
-                    k.parent.parent.color = "R" # Recolor grandparent to red
+                    self.recolorings += 2
+                    k.parent.color = BLACK  # Recolor parent to black
+                    k.parent.parent.color = RED # Recolor grandparent to red
                     self.rotateRight(k.parent.parent)
             else: # Parent is on the right side of the grandparent
                 u = k.parent.parent.left #uncle
-                if u.color == "R": # Case 1: Uncle is red
-                    u.color = "B"
-                    k.parent.color = "B"
-                    k.parent.parent.color = "R"
+                if u.color == RED: # Case 1: Uncle is red
+                    self.recolorings += 3
+                    u.color = BLACK
+                    k.parent.color = BLACK
+                    k.parent.parent.color = RED
                     k = k.parent.parent
                 else:  # Case 2: Uncle is black
                     if k == k.parent.left:
                         k = k.parent
                         self.rotateRight(k)
-                    k.parent.color = "B"
-                    k.parent.parent.color = "R"
+                    self.recolorings += 2
+                    k.parent.color = BLACK
+                    k.parent.parent.color = RED
                     self.rotateLeft(k.parent.parent)
             if k == self.root: # If k is now the root, break the loop
                 break
-        self.root.color = "B" # Ensure the root is always black
+        self.root.color = BLACK # Ensure the root is always black
 
 
     def addReservation(self, userID, seatID) -> None:
@@ -117,6 +191,7 @@ class RedBlackTree:
         the tree while maintaining the Red-Black properties using the addReservationHelper.
         """
         node = Booking(userID, seatID) #create a new booking node, node is Red for insertion always by default.
+        self.seatIndex.assign(seatID, userID)
         node.parent = None
         node.left = self.leaf
         node.right = self.leaf
@@ -142,7 +217,7 @@ class RedBlackTree:
 
         # If the node's parent is None, we simply return because no balancing is needed (root node is black)
         if node.parent == None:
-            node.color = "B"
+            node.color = BLACK
             return
 
         if node.parent.parent == None:
@@ -152,6 +227,70 @@ class RedBlackTree:
         self.addReservationHelper(node)
 
 
+    def bulkInsert(self, pairs) -> None:
+        """
+        Insert a batch of (userID, seatID) reservations.
+        
+        The batch is sorted by userID. A batch that is small compared to the tree is inserted node by node,
+        otherwise it is merged with the existing nodes in key order and the whole tree is rebuilt balanced in O(n + k).
+        """
+        pairs = sorted(pairs, key=lambda pair: pair[0])
+        if len(pairs) * 4 < self.size():  # size is kept by the seat index, no need to walk the tree to decide
+            for userID, seatID in pairs:
+                self.addReservation(userID, seatID)
+            return
+        existing = self.rangeQuery(float("-inf"), float("inf"))
+
+        new_nodes = []
+        for userID, seatID in pairs:
+            node = Booking(userID, seatID)
+            self.seatIndex.assign(seatID, userID)
+            new_nodes.append(node)
+
+        # merge the two sorted runs, on equal keys the existing node goes first just like addReservation sends it right
+        nodes = []
+        i = j = 0
+        while i < len(existing) and j < len(new_nodes):
+            if new_nodes[j].userID < existing[i].userID:
+                nodes.append(new_nodes[j])
+                j += 1
+            else:
+                nodes.append(existing[i])
+                i += 1
+        nodes.extend(existing[i:])
+        nodes.extend(new_nodes[j:])
+        self.buildFromSorted(nodes)
+
+
+    def buildFromSorted(self, nodes) -> None:
+        """
+        Relink a list of nodes sorted by userID into a balanced Red-Black Tree.
+        
+        Every node takes the middle of its range, so all nil leaves are on the last two levels. The nodes on the
+        last, incomplete level are coloured red and all others black, which gives every path the same black height.
+        """
+        red_depth = (len(nodes) + 1).bit_length() - 1  # number of complete levels
+        self.root = self.leaf
+        stack = [(0, len(nodes) - 1, None, 0, True)] if nodes else []  # ranges still to be linked
+        while stack:
+            lo, hi, parent, depth, is_left = stack.pop()
+            mid = (lo + hi) // 2
+            node = nodes[mid]
+            node.parent = parent
+            node.color = RED if depth == red_depth else BLACK
+            node.left = node.right = self.leaf
+            if parent is None:
+                self.root = node
+            elif is_left:
+                parent.left = node
+            else:
+                parent.right = node
+            if lo < mid:
+                stack.append((lo, mid - 1, node, depth + 1, True))
+            if mid < hi:
+                stack.append((mid + 1, hi, node, depth + 1, False))
+
+
     def deleteReservationHelper(self, x):
         """
         Fix any violations of Red-Black Tree properties after deleting a node.
@@ -159,52 +298,60 @@ class RedBlackTree:
         This function ensures that the Red-Black properties are restored after deleting
         a node. It involves a series of rotations and recoloring to maintain the tree's balance.
         """
-        while x != self.root and x.color == "B":
+        while x != self.root and x.color == BLACK:
             if x == x.parent.left:
                 sibling = x.parent.right
-                if sibling.color == "R": # Case 1: Sibling is red
-                    sibling.color = "B"
-                    x.parent.color = "R"
+                if sibling.color == RED: # Case 1: Sibling is red
+                    self.recolorings += 2
+                    sibling.color = BLACK
+                    x.parent.color = RED
                     self.rotateLeft(x.parent)
                     sibling = x.parent.right
                 # Case 2: Sibling is black, and both children are black
-                if sibling.left.color == "B" and sibling.right.color == "B":
-                    sibling.color = "R"
+                if sibling.left.color == BLACK and sibling.right.color == BLACK:
+                    self.recolorings += 1
+                    sibling.color = RED
                     x = x.parent
                 else: # Case 3: Sibling's right child is black
-                    if sibling.right.color == "B":
-                        sibling.left.color = "B"
-                        sibling.color = "R"
+                    if sibling.right.color == BLACK:
+                        self.recolorings += 2
+                        sibling.left.color = BLACK
+                        sibling.color = RED
                         self.rotateRight(sibling)
                         sibling = x.parent.right
                     # Case 4: Sibling's right child is red
+                    self.recolorings += 3
                     sibling.color = x.parent.color
-                    x.parent.color = "B"
-                    sibling.right.color = "B"
+                    x.parent.color = BLACK
+                    sibling.right.color = BLACK
                     self.rotateLeft(x.parent)
                     x = self.root
             else: # If x is the right child of its parent (similar logic to the left side)
                 sibling = x.parent.left
-                if sibling.color == "R":
-                    sibling.color = "B"
-                    x.parent.color = "R"
+                if sibling.color == RED:
+                    self.recolorings += 2
+                    sibling.color = BLACK
+                    x.parent.color = RED
                     self.rotateRight(x.parent)
                     sibling = x.parent.left
-                if sibling.right.color == "B" and sibling.left.color == "B":
-                    sibling.color = "R"
+                if sibling.right.color == BLACK and sibling.left.color == BLACK:
+                    self.recolorings += 1
+                    sibling.color = RED
                     x = x.parent
                 else:
-                    if sibling.left.color == "B":
-                        sibling.right.color = "B"
-                        sibling.color = "R"
+                    if sibling.left.color == BLACK:
+                        self.recolorings += 2
+                        sibling.right.color = BLACK
+                        sibling.color = RED
                         self.rotateLeft(sibling)
                         sibling = x.parent.left
+                    self.recolorings += 3
                     sibling.color = x.parent.color
-                    x.parent.color = "B"
-                    sibling.left.color = "B"
+                    x.parent.color = BLACK
+                    sibling.left.color = BLACK
                     self.rotateRight(x.parent)
                     x = self.root #move up to the root
-        x.color = "B"  # Ensure x is black (if it is the root or any other black node)
+        x.color = BLACK  # Ensure x is black (if it is the root or any other black node)
 
 
     def maintainTreeChildren(self, node1, node2):
@@ -213,6 +360,7 @@ class RedBlackTree:
         
         This function ensures that after deletion or replacement of a node, 
         the tree structure is properly updated, especially the parent references.
+        The parent of the sentinel leaf is set as well, the delete fix up starts from it when the removed node had no children.
         """
         if node1.parent == None:
             self.root = node2  # If node1 is the root, set the root to node2
@@ -222,8 +370,7 @@ class RedBlackTree:
         else:
             node1.parent.right = node2
 
-        if node2 != self.leaf:
-            node2.parent = node1.parent
+        node2.parent = node1.parent
 
 
     def inorderSuccessor(self, node):
@@ -246,11 +393,13 @@ class RedBlackTree:
         This function deletes the node from the tree and ensures that the tree's Red-Black
         properties are maintained using rotations and color fixes.
         """
+        self.seatIndex.release(node.seatID)
         y = node
         original_color = node.color # Save the original color of the node
 
         
         if node.left == self.leaf and node.right == self.leaf: # Case 1: Node has no children
+            x = self.leaf
             self.maintainTreeChildren(node, self.leaf)
 
         elif node.left == self.leaf: # Case 2: Node has one child (right child)
@@ -278,7 +427,7 @@ class RedBlackTree:
             y.left.parent = y
             y.color = node.color
 
-        if original_color == "black": # If the node that was deleted was black, fix any violations
+        if original_color == BLACK: # If the node that was deleted was black, fix any violations
             self.deleteReservationHelper(x)
 
 
@@ -293,19 +442,637 @@ class RedBlackTree:
             return True
         
         return False
+
+    def size(self) -> int:
+        """
+        number of reservations in the tree, every one of them holds exactly one seat of the seat index.
+        """
+        return self.seatIndex.count
+
+    def acceptsKey(self, userID) -> bool:
+        """
+        True if a reservation of this userID can be stored, Booking nodes hold any integer.
+        """
+        return True
     
 
+    def rangeQuery(self, lo, hi):
+        """
+        Return the nodes whose userID falls in the range [lo, hi], ordered by userID.
+        
+        Subtrees that lie completely outside the range are never visited, so the cost is
+        O(log n + k) for k matching nodes, independent of how wide the range is.
+        """
+        nodes = []
+        stack = []
+        node = self.root
+        while stack or node != self.leaf:
+            if node != self.leaf:
+                if node.userID >= lo:
+                    stack.append(node) # left subtree can still hold keys in range
+                    node = node.left
+                else:
+                    node = node.right # whole left subtree is below the range
+            else:
+                node = stack.pop()
+                if node.userID > hi: # everything after this node is above the range
+                    break
+                nodes.append(node)
+                node = node.right
+        return nodes
+
+
+    def height(self) -> int:
+        """
+        Number of nodes on the longest path from the root down to a leaf, 0 for an empty tree.
+        """
+        tallest = 0
+        stack = [(self.root, 1)] if self.root != self.leaf else []
+        while stack:
+            node, depth = stack.pop()
+            tallest = max(tallest, depth)
+            if node.left != self.leaf:
+                stack.append((node.left, depth + 1))
+            if node.right != self.leaf:
+                stack.append((node.right, depth + 1))
+        return tallest
+
+
+    def blackHeight(self) -> int:
+        """
+        Number of black nodes on the path from the root down to its leftmost leaf. In a valid tree every path has the same count.
+        """
+        count = 0
+        node = self.root
+        while node != self.leaf:
+            count += node.color == BLACK
+            node = node.left
+        return count
+
+
+    def validate(self) -> list:
+        """
+        Check every Red-Black Tree invariant over the whole tree and return a description of each violation found.
+        An empty list means the tree is healthy: search order, parent links, black root and leaves, no red node with
+        a red child, and the same black height on every path.
+        """
+        problems = []
+        if self.leaf.color != BLACK:
+            problems.append("sentinel leaf is not black")
+        if self.root != self.leaf and self.root.color != BLACK:
+            problems.append("root is not black")
+        black_heights = set()
+        stack = [(self.root, None, None, 0, None)]  # node, lower bound, upper bound, black nodes above, expected parent
+        while stack:
+            node, lo, hi, blacks, parent = stack.pop()
+            if node == self.leaf:
+                black_heights.add(blacks)
+                continue
+            if node.parent is not parent:
+                problems.append(f"user {node.userID} has a wrong parent link")
+            if (lo is not None and node.userID < lo) or (hi is not None and node.userID > hi):
+                problems.append(f"user {node.userID} is out of search order")
+            if node.color == RED and (node.left.color == RED or node.right.color == RED):
+                problems.append(f"red user {node.userID} has a red child")
+            blacks += node.color == BLACK
+            stack.append((node.left, lo, node.userID, blacks, node))
+            stack.append((node.right, node.userID, hi, blacks, node))
+        if len(black_heights) > 1:
+            problems.append(f"paths have different black heights {sorted(black_heights)}")
+        return problems
+
+
+    def seatOf(self, node):
+        """
+        returns the seatID stored in a node returned by search or rangeQuery.
+        """
+        return node.seatID
+
+
+    def userOf(self, node):
+        """
+        returns the userID stored in a node returned by search or rangeQuery.
+        """
+        return node.userID
+
+
     def inorder(self, root, bookings):
         """
         Perform an in-order traversal of the Red-Black Tree and store the booking information.
         
         This function appends the seatID and userID of each node to the bookings list.
+        It uses an explicit stack instead of recursion, so any depth of tree can be traversed.
+        """
+        stack = []
+        node = root
+        while stack or node != self.leaf:
+            if node != self.leaf:
+                stack.append(node)
+                node = node.left
+            else:
+                node = stack.pop()
+                bookings.append([node.seatID, node.userID])
+                node = node.right
+
+
+
+class ArrayRedBlackTree:
+    """
+    Red Black Tree engine that keeps its nodes in parallel arrays instead of Booking objects. Slot i of
+    key/seat/left/right/parent/color holds one node, and children and parents are slot numbers, so there is
+    no Python object per reservation. Slot 0 is the shared black nil leaf. Deleted slots are chained into
+    a free list through the left array and reused by later insertions.
+    Offers the same API as RedBlackTree, with node handles being slot numbers.
+    """
+    def __init__(self) -> None:
+        self.key = array('q', [0])  # userID of every slot, the key of the tree
+        self.seat = array('q', [0])  # seatID of every slot
+        self.left = array('q', [0])
+        self.right = array('q', [0])
+        self.parent = array('q', [0])
+        self.color = bytearray([BLACK])
+        self.leaf = 0  # slot of the nil leaf
+        self.root = self.leaf
+        self.free = 0  # head of the free list of deleted slots, 0 if empty
+        self.seatIndex = SeatIndex()  # seat ordered view of the same bookings, updated along with the tree
+        self.rotations = 0  # health counters, number of rotations and recolourings done while rebalancing
+        self.recolorings = 0
+
+
+    def newNode(self, userID, seatID) -> int:
+        """
+        Take a slot from the free list, or append a new one, and fill it with a red node.
+        """
+        if self.free:
+            node = self.free
+            self.key[node] = userID  # stored before the slot is unlinked, a userID out of range leaves the free list as it was
+            self.seat[node] = seatID
+            self.free = self.left[node]
+            self.left[node] = self.right[node] = self.parent[node] = 0
+            self.color[node] = RED
+        else:
+            node = len(self.key)
+            self.key.append(userID)
+            self.seat.append(seatID)
+            self.left.append(0)
+            self.right.append(0)
+            self.parent.append(0)
+            self.color.append(RED)
+        return node
+
+
+    def rotateLeft(self, x) -> None:
+        """
+        Perform a left rotation around node x.
+        """
+        self.rotations += 1
+        left, right, parent = self.left, self.right, self.parent
+        y = right[x]
+        right[x] = left[y]
+        if left[y] != 0:
+            parent[left[y]] = x
+        parent[y] = parent[x]
+        if parent[x] == 0:
+            self.root = y
+        elif x == left[parent[x]]:
+            left[parent[x]] = y
+        else:
+            right[parent[x]] = y
+        left[y] = x
+        parent[x] = y
+
+
+    def rotateRight(self, x) -> None:
+        """
+        Perform a right rotation around node x.
+        """
+        self.rotations += 1
+        left, right, parent = self.left, self.right, self.parent
+        y = left[x]
+        left[x] = right[y]
+        if right[y] != 0:
+            parent[right[y]] = x
+        parent[y] = parent[x]
+        if parent[x] == 0:
+            self.root = y
+        elif x == right[parent[x]]:
+            right[parent[x]] = y
+        else:
+            left[parent[x]] = y
+        right[y] = x
+        parent[x] = y
+
+
+    def search(self, node, user_id):
         """
-        if root != self.leaf:
-            self.inorder(root.left,bookings)
-            bookings.append([root.seatID, root.userID])
-            self.inorder(root.right,bookings)
+        Search for the slot with the given userID starting from the given slot. Returns None if the userID does not exist.
+        """
+        key, left, right = self.key, self.left, self.right
+        while node != 0:
+            if key[node] == user_id: #match found
+                return node
+            node = left[node] if user_id < key[node] else right[node]
+        return None
+
+
+    def addReservation(self, userID, seatID) -> None:
+        """
+        Insert a new reservation into the tree and restore the Red-Black properties.
+        """
+        node = self.newNode(userID, seatID)
+        self.seatIndex.assign(seatID, userID)
+        key, left, right, parent, color = self.key, self.left, self.right, self.parent, self.color
+
+        y = 0
+        x = self.root
+        while x != 0:
+            y = x
+            x = left[x] if userID < key[x] else right[x]
+        parent[node] = y
+        if y == 0:
+            self.root = node
+        elif userID < key[y]:
+            left[y] = node
+        else:
+            right[y] = node
+
+        k = node
+        while color[parent[k]] == RED:
+            p = parent[k]
+            g = parent[p]
+            if p == left[g]:
+                u = right[g]  # uncle
+                if color[u] == RED:  # Case 1: Uncle is red
+                    self.recolorings += 3
+                    color[p] = BLACK
+                    color[u] = BLACK
+                    color[g] = RED
+                    k = g
+                else:
+                    if k == right[p]:  # Case 2: k is a right child
+                        k = p
+                        self.rotateLeft(k)
+                        p = parent[k]
+                        g = parent[p]
+                    self.recolorings += 2
+                    color[p] = BLACK  # Case 3
+                    color[g] = RED
+                    self.rotateRight(g)
+            else:
+                u = left[g]  # uncle
+                if color[u] == RED:
+                    self.recolorings += 3
+                    color[p] = BLACK
+                    color[u] = BLACK
+                    color[g] = RED
+                    k = g
+                else:
+                    if k == left[p]:
+                        k = p
+                        self.rotateRight(k)
+                        p = parent[k]
+                        g = parent[p]
+                    self.recolorings += 2
+                    color[p] = BLACK
+                    color[g] = RED
+                    self.rotateLeft(g)
+        color[self.root] = BLACK
+
+
+    def transplant(self, u, v) -> None:
+        """
+        Put the subtree at slot v in the place of the subtree at slot u. The parent of the nil leaf is set too,
+        the delete fix up starts from it when the removed node had no children.
+        """
+        parent = self.parent
+        if parent[u] == 0:
+            self.root = v
+        elif u == self.left[parent[u]]:
+            self.left[parent[u]] = v
+        else:
+            self.right[parent[u]] = v
+        parent[v] = parent[u]
+
+
+    def deleteReservation(self, node) -> None:
+        """
+        Delete the reservation at the given slot, restore the Red-Black properties and put the slot on the free list.
+        """
+        left, right, parent, color = self.left, self.right, self.parent, self.color
+        self.seatIndex.release(self.seat[node])
+
+        y = node
+        original_color = color[y]
+        if left[node] == 0:
+            x = right[node]
+            self.transplant(node, right[node])
+        elif right[node] == 0:
+            x = left[node]
+            self.transplant(node, left[node])
+        else:
+            y = right[node]
+            while left[y] != 0: #in-order successor
+                y = left[y]
+            original_color = color[y]
+            x = right[y]
+            if parent[y] == node:
+                parent[x] = y
+            else:
+                self.transplant(y, right[y])
+                right[y] = right[node]
+                parent[right[y]] = y
+            self.transplant(node, y)
+            left[y] = left[node]
+            parent[left[y]] = y
+            color[y] = color[node]
+
+        if original_color == BLACK:
+            self.deleteFixup(x)
+
+        left[node] = self.free
+        self.free = node
+
+
+    def deleteFixup(self, x) -> None:
+        """
+        Fix the Red-Black properties after removing a black node, x carries the extra black.
+        """
+        left, right, parent, color = self.left, self.right, self.parent, self.color
+        while x != self.root and color[x] == BLACK:
+            p = parent[x]
+            if x == left[p]:
+                w = right[p]  # sibling
+                if color[w] == RED:
+                    self.recolorings += 2
+                    color[w] = BLACK
+                    color[p] = RED
+                    self.rotateLeft(p)
+                    w = right[parent[x]]
+                if color[left[w]] == BLACK and color[right[w]] == BLACK:
+                    self.recolorings += 1
+                    color[w] = RED
+                    x = parent[x]
+                else:
+                    if color[right[w]] == BLACK:
+                        self.recolorings += 2
+                        color[left[w]] = BLACK
+                        color[w] = RED
+                        self.rotateRight(w)
+                        w = right[parent[x]]
+                    self.recolorings += 3
+                    color[w] = color[parent[x]]
+                    color[parent[x]] = BLACK
+                    color[right[w]] = BLACK
+                    self.rotateLeft(parent[x])
+                    x = self.root
+            else:
+                w = left[p]
+                if color[w] == RED:
+                    self.recolorings += 2
+                    color[w] = BLACK
+                    color[p] = RED
+                    self.rotateRight(p)
+                    w = left[parent[x]]
+                if color[right[w]] == BLACK and color[left[w]] == BLACK:
+                    self.recolorings += 1
+                    color[w] = RED
+                    x = parent[x]
+                else:
+                    if color[left[w]] == BLACK:
+                        self.recolorings += 2
+                        color[right[w]] = BLACK
+                        color[w] = RED
+                        self.rotateLeft(w)
+                        w = left[parent[x]]
+                    self.recolorings += 3
+                    color[w] = color[parent[x]]
+                    color[parent[x]] = BLACK
+                    color[left[w]] = BLACK
+                    self.rotateRight(parent[x])
+                    x = self.root
+        color[x] = BLACK
+
+
+    def isEmpty(self):
+        """
+        Check if the tree is empty.
+        """
+        return self.root == 0
+
+    def size(self) -> int:
+        """
+        number of reservations in the tree.
+        """
+        return self.seatIndex.count
+
+    def acceptsKey(self, userID) -> bool:
+        """
+        True if a reservation of this userID can be stored, the key array only holds int64 userIDs.
+        Checked by the service before a seat is taken, a failed store would lose it.
+        """
+        return INT64_MIN <= userID <= INT64_MAX
+
+
+    def rangeQuery(self, lo, hi):
+        """
+        Return the slots whose userID falls in the range [lo, hi], ordered by userID, in O(log n + k).
+        """
+        key, left, right = self.key, self.left, self.right
+        nodes = []
+        stack = []
+        node = self.root
+        while stack or node != 0:
+            if node != 0:
+                if key[node] >= lo:
+                    stack.append(node)
+                    node = left[node]
+                else:
+                    node = right[node]
+            else:
+                node = stack.pop()
+                if key[node] > hi:
+                    break
+                nodes.append(node)
+                node = right[node]
+        return nodes
+
+
+    def bulkInsert(self, pairs) -> None:
+        """
+        Insert a batch of (userID, seatID) reservations, merging and rebuilding the tree when the batch is large.
+        """
+        pairs = sorted(pairs, key=lambda pair: pair[0])
+        if pairs and not (INT64_MIN <= pairs[0][0] and pairs[-1][0] <= INT64_MAX):
+            raise OverflowError("userID out of the int64 range of the array engine")  # before any slot is taken
+        if len(pairs) * 4 < self.size():  # size is kept by the seat index, no need to walk the tree to decide
+            for userID, seatID in pairs:
+                self.addReservation(userID, seatID)
+            return
+        existing = self.rangeQuery(float("-inf"), float("inf"))
+
+        key = self.key
+        new_nodes = []
+        for userID, seatID in pairs:
+            new_nodes.append(self.newNode(userID, seatID))
+            self.seatIndex.assign(seatID, userID)
+
+        nodes = []
+        i = j = 0
+        while i < len(existing) and j < len(new_nodes):
+            if key[new_nodes[j]] < key[existing[i]]:
+                nodes.append(new_nodes[j])
+                j += 1
+            else:
+                nodes.append(existing[i])
+                i += 1
+        nodes.extend(existing[i:])
+        nodes.extend(new_nodes[j:])
+        self.buildFromSorted(nodes)
+
+
+    def buildFromSorted(self, nodes) -> None:
+        """
+        Relink a list of slots sorted by userID into a balanced tree, colouring the last incomplete level red.
+        """
+        left, right, parent, color = self.left, self.right, self.parent, self.color
+        red_depth = (len(nodes) + 1).bit_length() - 1
+        self.root = 0
+        stack = [(0, len(nodes) - 1, 0, 0, True)] if nodes else []
+        while stack:
+            lo, hi, up, depth, is_left = stack.pop()
+            mid = (lo + hi) // 2
+            node = nodes[mid]
+            parent[node] = up
+            color[node] = RED if depth == red_depth else BLACK
+            left[node] = right[node] = 0
+            if up == 0:
+                self.root = node
+            elif is_left:
+                left[up] = node
+            else:
+                right[up] = node
+            if lo < mid:
+                stack.append((lo, mid - 1, node, depth + 1, True))
+            if mid < hi:
+                stack.append((mid + 1, hi, node, depth + 1, False))
+
+
+    def height(self) -> int:
+        """
+        Number of nodes on the longest path from the root down to a leaf, 0 for an empty tree.
+        """
+        left, right = self.left, self.right
+        tallest = 0
+        stack = [(self.root, 1)] if self.root != 0 else []
+        while stack:
+            node, depth = stack.pop()
+            tallest = max(tallest, depth)
+            if left[node] != 0:
+                stack.append((left[node], depth + 1))
+            if right[node] != 0:
+                stack.append((right[node], depth + 1))
+        return tallest
+
+
+    def blackHeight(self) -> int:
+        """
+        Number of black nodes on the path from the root down to its leftmost leaf.
+        """
+        count = 0
+        node = self.root
+        while node != 0:
+            count += self.color[node] == BLACK
+            node = self.left[node]
+        return count
+
+
+    def validate(self) -> list:
+        """
+        Check every Red-Black Tree invariant over the whole tree and return a description of each violation found,
+        an empty list means the tree is healthy.
+        """
+        key, left, right, parent, color = self.key, self.left, self.right, self.parent, self.color
+        problems = []
+        if color[0] != BLACK:
+            problems.append("nil leaf is not black")
+        if self.root != 0 and color[self.root] != BLACK:
+            problems.append("root is not black")
+        black_heights = set()
+        stack = [(self.root, None, None, 0, 0)]
+        while stack:
+            node, lo, hi, blacks, up = stack.pop()
+            if node == 0:
+                black_heights.add(blacks)
+                continue
+            if parent[node] != up:
+                problems.append(f"user {key[node]} has a wrong parent link")
+            if (lo is not None and key[node] < lo) or (hi is not None and key[node] > hi):
+                problems.append(f"user {key[node]} is out of search order")
+            if color[node] == RED and (color[left[node]] == RED or color[right[node]] == RED):
+                problems.append(f"red user {key[node]} has a red child")
+            blacks += color[node] == BLACK
+            stack.append((left[node], lo, key[node], blacks, node))
+            stack.append((right[node], key[node], hi, blacks, node))
+        if len(black_heights) > 1:
+            problems.append(f"paths have different black heights {sorted(black_heights)}")
+        return problems
+
+
+    def seatOf(self, node):
+        """
+        returns the seatID stored in a slot returned by search or rangeQuery.
+        """
+        return self.seat[node]
+
+
+    def userOf(self, node):
+        """
+        returns the userID stored in a slot returned by search or rangeQuery.
+        """
+        return self.key[node]
+
+
+    def inorder(self, root, bookings):
+        """
+        In-order traversal from the given slot, appends [seatID, userID] of every node to bookings.
+        """
+        key, seat, left, right = self.key, self.seat, self.left, self.right
+        stack = []
+        node = root
+        while stack or node != 0:
+            if node != 0:
+                stack.append(node)
+                node = left[node]
+            else:
+                node = stack.pop()
+                bookings.append([seat[node], key[node]])
+                node = right[node]
+
+
+    def snapshot(self):
+        """
+        Returns an independent copy of the tree. Every buffer is copied as a whole, there are no nodes to walk.
+        """
+        copy = ArrayRedBlackTree.__new__(ArrayRedBlackTree)
+        copy.key = self.key[:]
+        copy.seat = self.seat[:]
+        copy.left = self.left[:]
+        copy.right = self.right[:]
+        copy.parent = self.parent[:]
+        copy.color = self.color[:]
+        copy.leaf = 0
+        copy.root = self.root
+        copy.free = self.free
+        copy.seatIndex = SeatIndex()
+        copy.seatIndex.owner = self.seatIndex.owner[:]
+        copy.seatIndex.count = self.seatIndex.count
+        copy.rotations = self.rotations
+        copy.recolorings = self.recolorings
+        return copy
+
 
+# reservation tree engines that GatorTicketMaster can be constructed with
+ENGINES = {"linked": RedBlackTree, "array": ArrayRedBlackTree}
 
 # if __name__ == "__main__":
 #     rbt = RedBlackTree()
@@ -2,16 +2,17 @@
 class MinHeapSeats:
     """
     Class to create a min binary heap for available seats. Provides basic operations like push, poll/pop, peek, size, resize, isEmpty, heapifyUp & heapifyDown
+    Seats taken out of the middle of the heap by takeRun are deleted lazily: they stay in the array, are listed in
+    removed and are skipped when they reach the top.
     """
-    heap = []  # start with an empty array
-    max_seat = -1 # variable to store last highest seat ever pushed on the heap. Helpful for resizing.
-
     def __init__(self,size) -> None:
         """
         initializes heap with some specific size.
         """
-        for i in range(0,size):
-            self.push(i+1)
+        self.heap = []  # start with an empty array
+        self.removed = set()  # seats still in the heap array that are not free anymore
+        self.max_seat = 0 # variable to store last highest seat ever pushed on the heap. Helpful for resizing.
+        self.resize(size)
 
     def push(self, seat_id) -> None:
         """
@@ -19,14 +20,47 @@ class MinHeapSeats:
         add elements/seats to heap at last index, calls the heapifyUp function.
         """
         self.max_seat = seat_id if seat_id > self.max_seat else self.max_seat
+        if self.removed and seat_id in self.removed:
+            self.removed.discard(seat_id)  # the seat never left the array, it is free again
+            return
         self.heap.append(seat_id)
         self.heapifyUp(len(self.heap) - 1)
 
+    def pushMany(self, seat_ids) -> None:
+        """
+        push a batch of seats. A large batch is appended as is and the whole heap is rebuilt in O(n) by heapify,
+        a small one is pushed seat by seat as that is cheaper than touching the whole heap.
+        """
+        seat_ids = list(seat_ids)
+        if not seat_ids:
+            return
+        self.max_seat = max(self.max_seat, max(seat_ids))
+        if self.removed:
+            back = self.removed.intersection(seat_ids)
+            self.removed -= back
+            seat_ids = [seat_id for seat_id in seat_ids if seat_id not in back]
+        if len(seat_ids) * 4 < len(self.heap):
+            for seat_id in seat_ids:
+                self.heap.append(seat_id)
+                self.heapifyUp(len(self.heap) - 1)
+        else:
+            self.heap.extend(seat_ids)
+            self.heapify()
+
+    def heapify(self) -> None:
+        """
+        rebuild the heap property over the whole array bottom-up, O(n).
+        """
+        for idx in range(len(self.heap) // 2 - 1, -1, -1):
+            self.heapifyDown(idx)
+
     def poll(self) -> int:
         """
         pops the top most/ min element (integer) from the heap and returns it as well.
         If heap is empty returns -1.
         """
+        if self.removed:
+            self.dropRemoved()
         if len(self.heap) > 0:
             root = self.heap[0]
             self.heap[0] = self.heap[-1] #exchange with the last element, heapify down handles the structure later.
@@ -36,10 +70,26 @@ class MinHeapSeats:
         
         return -1
     
+    def pollMany(self, count) -> list:
+        """
+        pops the lowest count seats (or all of them if there are fewer) and returns them in increasing order.
+        For a large batch the heap is sorted once, the sorted remainder is itself a valid min heap.
+        """
+        if count * 16 >= len(self.heap):
+            if self.removed:
+                self.compact()
+            self.heap.sort()
+            taken = self.heap[:count]
+            del self.heap[:count]
+            return taken
+        return [self.poll() for _ in range(count)]
+
     def peek(self) -> int:
         """
         returns the top/min element on heap
         """
+        if self.removed:
+            self.dropRemoved()
         if len(self.heap) > 0:
             return self.heap[0]
 
@@ -47,24 +97,80 @@ class MinHeapSeats:
     
     def size(self):
         """
-        returns current size of heap
+        returns current number of free seats
         """
-        return len(self.heap)
+        return len(self.heap) - len(self.removed)
     
     def resize(self,new_seats: int) -> None:
         """
         reshape the heap by adding more seats starting from the max_seats+1 upto the count provided.
+        The new seats are an increasing run and every one of them is larger than any seat already present,
+        so appending them in order keeps the heap property without any heapifyUp, O(count).
         """
         max = self.max_seat
-        for i in range(max+1 , max + new_seats + 1):
-            self.max_seat = i  # update the max_seat value for future calls to same function
-            self.push(i)
+        self.heap.extend(range(max + 1, max + new_seats + 1))
+        self.max_seat = max + new_seats  # update the max_seat value for future calls to same function
 
     def isEmpty(self) -> bool:
         """
         return boolean value if the heap is empty or not.
         """
-        return len(self.heap) == 0
+        return len(self.heap) == len(self.removed)
+
+    def takeRun(self, start, count) -> None:
+        """
+        takes the free seats start to start + count - 1 out of the heap. They are only marked as removed, the heap
+        is compacted once removed seats are half of it.
+        """
+        self.removed.update(range(start, start + count))
+        if 2 * len(self.removed) > len(self.heap):
+            self.compact()
+
+    def dropRemoved(self) -> None:
+        """
+        pops removed seats off the top of the heap until a free seat is at the top.
+        """
+        heap, removed = self.heap, self.removed
+        while heap and heap[0] in removed:
+            removed.discard(heap[0])
+            heap[0] = heap[-1]
+            heap.pop()
+            self.heapifyDown(0)
+
+    def compact(self) -> None:
+        """
+        rebuild the heap from the free seats only, O(n).
+        """
+        removed = self.removed
+        self.heap = [seat_id for seat_id in self.heap if seat_id not in removed]
+        removed.clear()
+        self.heapify()
+
+    def runs(self) -> list:
+        """
+        returns the free seats as a list of (start, end) runs of consecutive seats, in increasing order.
+        """
+        runs = []
+        removed = self.removed
+        for seat_id in sorted(self.heap):
+            if seat_id in removed:
+                continue
+            if runs and runs[-1][1] == seat_id - 1:
+                runs[-1][1] = seat_id
+            else:
+                runs.append([seat_id, seat_id])
+        return [(start, end) for start, end in runs]
+
+    @classmethod
+    def fromRuns(cls, runs, max_seat):
+        """
+        creates the heap holding the given (start, end) runs of free seats. Increasing runs are already a valid min heap.
+        """
+        seats = cls(0)
+        for start, end in runs:
+            seats.heap.extend(range(start, end + 1))
+        seats.max_seat = max_seat
+        return seats
 
     def heapifyUp(self, idx) -> None:
         """
@@ -85,16 +191,344 @@ class MinHeapSeats:
         Now the last element maybe the max element or not, is at root and compared with its left and right child at each level is swapped accordingly,
         and moves down to its correct position.
         """
-        left_child = 2 * idx + 1
-        right_child = 2 * idx + 2
-        smallest = idx #assume the curr index is smallest
-
-        if left_child < len(self.heap) and self.heap[left_child] < self.heap[smallest]:
-            smallest = left_child
-        if right_child < len(self.heap) and self.heap[right_child] < self.heap[smallest]:
-            smallest = right_child
-        if smallest != idx:
-            # swap elements
-            self.heap[smallest], self.heap[idx] = self.heap[idx], self.heap[smallest]
-            #compare it recursively
-            self.heapifyDown(smallest) 
\ No newline at end of file
+        heap = self.heap
+        size = len(heap)
+        while True:
+            left_child = 2 * idx + 1
+            right_child = 2 * idx + 2
+            smallest = idx #assume the curr index is smallest
+
+            if left_child < size and heap[left_child] < heap[smallest]:
+                smallest = left_child
+            if right_child < size and heap[right_child] < heap[smallest]:
+                smallest = right_child
+            if smallest == idx:
+                break
+            # swap elements and continue one level down
+            heap[smallest], heap[idx] = heap[idx], heap[smallest]
+            idx = smallest
+
+class IntervalSeats:
+    """
+    Class to keep the available seats as a set of disjoint free intervals [start, end] instead of one heap entry per seat.
+    A fresh or grown range of seats is a single interval, so memory depends on how fragmented the free seats are and not on how many there are.
+    Provides the same operations as MinHeapSeats and hands out seats in the same order, lowest seat first.
+    """
+    def __init__(self, size) -> None:
+        """
+        initializes the allocator with seats 1 to size as one free interval.
+        """
+        self.end_of = {}  # start -> end of every free interval
+        self.start_of = {}  # end -> start of every free interval, used to merge with the left neighbour
+        self.starts = MinHeapSeats(0)  # interval starts lowest first, may hold stale starts of merged intervals
+        self.count = 0  # number of free seats over all the intervals
+        self.max_seat = 0  # last highest seat ever added. Helpful for resizing.
+        self.resize(size)
+
+    def addInterval(self, start, end) -> None:
+        """
+        add the free interval [start, end] and merge it with the intervals right before and after it, if any.
+        """
+        if start - 1 in self.start_of:
+            start = self.start_of.pop(start - 1)  # extend the left neighbour, its start is already on the heap
+        else:
+            self.starts.push(start)
+        if end + 1 in self.end_of:
+            right_end = self.end_of.pop(end + 1)  # absorb the right neighbour, its start becomes stale on the heap
+            del self.start_of[right_end]
+            end = right_end
+        self.end_of[start] = end
+        self.start_of[end] = start
+
+    def lowestStart(self) -> int:
+        """
+        returns the start of the lowest free interval, dropping stale starts from the top of the heap. Returns -1 if there is none.
+        """
+        while not self.starts.isEmpty() and self.starts.peek() not in self.end_of:
+            self.starts.poll()
+        return self.starts.peek()
+
+    def push(self, seat_id) -> None:
+        """
+        return a single seat to the free intervals.
+        """
+        self.max_seat = seat_id if seat_id > self.max_seat else self.max_seat
+        self.count += 1
+        self.addInterval(seat_id, seat_id)
+        if self.starts.size() > 2 * len(self.end_of) + 16:
+            self.compact()
+
+    def pushMany(self, seat_ids) -> None:
+        """
+        return a batch of seats to the free intervals.
+        """
+        for seat_id in seat_ids:
+            self.push(seat_id)
+
+    def poll(self) -> int:
+        """
+        takes the lowest free seat and returns it, shrinking the interval it belongs to.
+        If there is no free seat returns -1.
+        """
+        start = self.lowestStart()
+        if start == -1:
+            return -1
+
+        end = self.end_of.pop(start)
+        self.count -= 1
+        if start == end:
+            del self.start_of[end]
+            self.starts.poll()
+        else:
+            self.end_of[start + 1] = end
+            self.start_of[end] = start + 1
+            self.starts.heap[0] = start + 1  # replace the top in place, it can only move down
+            self.starts.heapifyDown(0)
+        return start
+
+    def pollMany(self, count) -> list:
+        """
+        takes the lowest count free seats (or all of them if there are fewer) and returns them in increasing order,
+        consuming whole intervals at a time.
+        """
+        taken = []
+        while len(taken) < count and self.count > 0:
+            start = self.lowestStart()
+            end = self.end_of[start]
+            last = min(end, start + count - len(taken) - 1)  # last seat taken from this interval
+            taken.extend(range(start, last + 1))
+            self.count -= last - start + 1
+            del self.end_of[start]
+            if last == end:
+                del self.start_of[end]
+                self.starts.poll()
+            else:
+                self.end_of[last + 1] = end
+                self.start_of[end] = last + 1
+                self.starts.heap[0] = last + 1
+                self.starts.heapifyDown(0)
+        return taken
+
+    def peek(self) -> int:
+        """
+        returns the lowest free seat without removing it
+        """
+        return self.lowestStart()
+
+    def takeRun(self, start, count) -> None:
+        """
+        takes the free seats start to start + count - 1. start has to be the first seat of a free interval,
+        which the lowest block found by BlockSeats always is.
+        """
+        end = self.end_of.pop(start)
+        last = start + count - 1
+        self.count -= count
+        if last == end:
+            del self.start_of[end]
+        else:
+            self.end_of[last + 1] = end
+            self.start_of[end] = last + 1
+            self.starts.push(last + 1)  # the old start stays on the heap as a stale entry
+
+    def size(self):
+        """
+        returns number of free seats
+        """
+        return self.count
+
+    def resize(self, new_seats: int) -> None:
+        """
+        adds the seats max_seats+1 upto the count provided as one interval, O(1).
+        """
+        if new_seats <= 0:
+            return
+        self.addInterval(self.max_seat + 1, self.max_seat + new_seats)
+        self.max_seat += new_seats
+        self.count += new_seats
+
+    def isEmpty(self) -> bool:
+        """
+        return boolean value if there are no free seats.
+        """
+        return self.count == 0
+
+    def runs(self) -> list:
+        """
+        returns the free seats as a list of (start, end) intervals, in increasing order.
+        """
+        return sorted(self.end_of.items())
+
+    @classmethod
+    def fromRuns(cls, runs, max_seat):
+        """
+        creates the allocator holding the given (start, end) intervals of free seats.
+        """
+        seats = cls(0)
+        for start, end in runs:
+            seats.addInterval(start, end)
+            seats.count += end - start + 1
+        seats.max_seat = max_seat
+        return seats
+
+    def compact(self) -> None:
+        """
+        rebuild the heap of starts from the live intervals only. A sorted array is already a valid min heap.
+        """
+        self.starts.heap = sorted(self.end_of)
+
+
+class FreeRunTree:
+    """
+    Segment tree over the seat numbers that finds the lowest block of k adjacent free seats in O(log n).
+    Every node stores, for its range of seats, the longest run of free seats, the free run at the start of the
+    range (prefix) and the one at its end (suffix). The tree is an implicit array with the leaves at
+    capacity + seat - 1, the capacity is a power of two and doubles when seats are added beyond it.
+    """
+    def __init__(self, runs, max_seat) -> None:
+        """
+        builds the tree over the seats 1 to max_seat, the seats in the (start, end) runs are free.
+        """
+        capacity = 1
+        while capacity < max_seat:
+            capacity *= 2
+        leaves = [0] * capacity
+        for start, end in runs:
+            leaves[start - 1:end] = [1] * (end - start + 1)
+        self.build(capacity, leaves)
+
+    def build(self, capacity, leaves) -> None:
+        self.capacity = capacity
+        self.prefix = [0] * capacity + leaves
+        self.suffix = [0] * capacity + leaves
+        self.best = [0] * capacity + leaves
+        for node in range(capacity - 1, 0, -1):
+            self.pull(node)
+
+    def pull(self, node) -> None:
+        """
+        recompute a node from its two children.
+        """
+        prefix, suffix, best = self.prefix, self.suffix, self.best
+        left, right = 2 * node, 2 * node + 1
+        half = self.capacity >> (node.bit_length())  # number of seats under each child
+        prefix[node] = prefix[left] + prefix[right] if prefix[left] == half else prefix[left]
+        suffix[node] = suffix[right] + suffix[left] if suffix[right] == half else suffix[right]
+        best[node] = max(best[left], best[right], suffix[left] + prefix[right])
+
+    def grow(self, max_seat) -> None:
+        """
+        doubles the capacity until max_seat fits, the new seats start as taken.
+        """
+        if max_seat <= self.capacity:
+            return
+        capacity = self.capacity
+        leaves = self.prefix[capacity:]
+        while capacity < max_seat:
+            capacity *= 2
+        leaves.extend([0] * (capacity - len(leaves)))
+        self.build(capacity, leaves)
+
+    def setRange(self, start, end, free) -> None:
+        """
+        marks the seats start to end as free (1) or taken (0), then recomputes their ancestors level by level, O(k + log n).
+        """
+        lo, hi = self.capacity + start - 1, self.capacity + end - 1
+        value = 1 if free else 0
+        prefix, suffix, best = self.prefix, self.suffix, self.best
+        for leaf in range(lo, hi + 1):
+            prefix[leaf] = suffix[leaf] = best[leaf] = value
+        while lo > 1:
+            lo, hi = lo // 2, hi // 2
+            for node in range(lo, hi + 1):
+                self.pull(node)
+
+    def setSeats(self, seat_ids, free) -> None:
+        """
+        marks a batch of seats, every run of consecutive seats in it is one setRange.
+        """
+        start = end = None
+        for seat_id in sorted(seat_ids):
+            if end is not None and seat_id == end + 1:
+                end = seat_id
+                continue
+            if start is not None:
+                self.setRange(start, end, free)
+            start = end = seat_id
+        if start is not None:
+            self.setRange(start, end, free)
+
+    def find(self, k):
+        """
+        returns the first seat of the lowest numbered block of k adjacent free seats, or None if there is none.
+        """
+        prefix, suffix, best = self.prefix, self.suffix, self.best
+        if k <= 0 or best[1] < k:
+            return None
+        node, first = 1, 1  # first is the lowest seat under node
+        half = self.capacity // 2
+        while node < self.capacity:
+            left, right = 2 * node, 2 * node + 1
+            if best[left] >= k:
+                node = left
+            elif suffix[left] + prefix[right] >= k:
+                return first + half - suffix[left]  # the run crosses the middle of the range
+            else:
+                node, first = right, first + half
+            half //= 2
+        return first
+
+
+class BlockSeats:
+    """
+    Wrapper over a seat allocator that keeps a FreeRunTree in sync with it, for booking adjacent seats.
+    Every change of the free seats goes through the wrapper, which forwards it to the allocator and updates the
+    tree, so single seat reserves, cancels, releases and added seats are all seen by the block search.
+    The service only wraps its allocator on the first block booking, until then nothing is paid for the tree.
+    """
+    def __init__(self, allocator) -> None:
+        self.allocator = allocator
+        self.tree = FreeRunTree(allocator.runs(), allocator.max_seat)
+
+    def __getattr__(self, name):
+        return getattr(self.allocator, name)  # read only calls: size, isEmpty, peek, runs, max_seat
+
+    def push(self, seat_id) -> None:
+        self.allocator.push(seat_id)
+        self.tree.grow(seat_id)
+        self.tree.setRange(seat_id, seat_id, True)
+
+    def pushMany(self, seat_ids) -> None:
+        seat_ids = list(seat_ids)
+        self.allocator.pushMany(seat_ids)
+        if seat_ids:
+            self.tree.grow(max(seat_ids))
+            self.tree.setSeats(seat_ids, True)
+
+    def poll(self) -> int:
+        seat_id = self.allocator.poll()
+        if seat_id != -1:
+            self.tree.setRange(seat_id, seat_id, False)
+        return seat_id
+
+    def pollMany(self, count) -> list:
+        taken = self.allocator.pollMany(count)
+        self.tree.setSeats(taken, False)  # the lowest seats, most of the time a few runs
+        return taken
+
+    def resize(self, new_seats) -> None:
+        first = self.allocator.max_seat + 1
+        self.allocator.resize(new_seats)
+        if new_seats > 0:
+            self.tree.grow(self.allocator.max_seat)
+            self.tree.setRange(first, self.allocator.max_seat, True)
+
+    def findBlock(self, k):
+        return self.tree.find(k)
+
+    def takeRun(self, start, count) -> None:
+        self.allocator.takeRun(start, count)
+        self.tree.setRange(start, start + count - 1, False)
+
+
+# seat allocator backends that GatorTicketMaster can be constructed with
+ALLOCATORS = {"heap": MinHeapSeats, "interval": IntervalSeats}
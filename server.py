@@ -0,0 +1,189 @@
+import argparse
+import asyncio
+
+import GatorTicketMasterService
+import reservations
+import seats
+import waitlist
+from gatorTicketMaster import parseCall, oneArg, buildDispatch
+
+DEFAULT_EVENT = "0"  # event used by a connection until it sends Event(id)
+
+
+class EventWorker:
+    """
+    One event served over the network: its GatorTicketMaster, the dispatch table of the command line driver and a
+    queue of pending commands drained by a single writer task, so the commands of an event are applied one at a time
+    in the order they arrived, whichever connection they came from. After every command the writer task publishes
+    the free seat and waitlist counts, which Available() reads without waiting behind the queue.
+    """
+    def __init__(self, gtm) -> None:
+        self.gtm = gtm
+        self.sizes = None  # (free seats, waitlist) after the last command applied, None until the event is initialized
+        self.waiting = {}  # future of a queued command -> futures of the Available() answers due right after it
+        self.output = []
+        self.dispatch = buildDispatch(gtm, self.output.append)
+        self.queue = asyncio.Queue()
+        self.task = asyncio.get_running_loop().create_task(self.run())
+
+    def apply(self, api, args) -> str:
+        """
+        runs one command and returns its output lines. Unknown commands have no output, like in the input files,
+        and an error is answered with its message instead of stopping the server.
+        """
+        self.output.clear()
+        handler = self.dispatch.get(api)
+        try:
+            if handler is not None:
+                handler(args)
+        except Exception as e:
+            self.output.append(f"{e}\n")
+        return "".join(self.output)
+
+    def submit(self, api, args) -> asyncio.Future:
+        """
+        queue a command for the writer task, the returned future gets its output.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((api, args, future))
+        return future
+
+    def available(self) -> str:
+        """
+        answer of Available() from the counts published by the writer task.
+        """
+        if self.sizes is None:
+            return "Seats not initialized yet!!\n"
+        free, waiting = self.sizes
+        return f"Total Seats Available : {free}, Waitlist : {waiting}\n"
+
+    def availableAfter(self, command) -> asyncio.Future:
+        """
+        returns a future for the answer of Available() right after the queued command is applied, before the next one.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.waiting.setdefault(command, []).append(future)
+        return future
+
+    async def run(self) -> None:
+        gtm = self.gtm
+        while True:
+            api, args, future = await self.queue.get()
+            output = self.apply(api, args)
+            if gtm.eventInitialized:
+                #a new tuple, a reader sees either the old counts or the new ones
+                self.sizes = (gtm.seats.size(), 0 if gtm.waitlist is None else gtm.waitlist.size())
+            future.set_result(output)
+            waiting = self.waiting.pop(future, None)
+            if waiting is not None:
+                answer = self.available()
+                for available in waiting:
+                    available.set_result(answer)
+
+
+class TicketServer:
+    """
+    asyncio TCP front-end speaking the same grammar as the input files, one command per line, for example
+    Reserve(12, 3). Every command is answered with its output lines followed by an empty line.
+    Event(id) switches the connection to another event, each event is created on first use.
+
+    Requests can be pipelined, a connection may send more commands before reading the answers, and the answers are
+    always written back in the order of the commands. Available() does not wait behind the writes queued for the
+    event: with no command of its own connection still pending on the event it is answered at once from the counts
+    published after the last applied command, otherwise it is answered with the counts right after the last pending
+    command of its connection, so a connection sees its own earlier commands and none of its later ones.
+    """
+    def __init__(self, **options) -> None:
+        """
+        options are passed to the GatorTicketMaster constructor of every event.
+        """
+        self.options = options
+        self.events = {}
+
+    def event(self, eventID) -> EventWorker:
+        worker = self.events.get(eventID)
+        if worker is None:
+            worker = self.events[eventID] = EventWorker(GatorTicketMasterService.GatorTicketMaster(**self.options))
+        return worker
+
+    async def handle(self, reader, writer) -> None:
+        """
+        serves one connection: reads commands as they arrive and queues their answers in order for the sender task.
+        """
+        answers = asyncio.Queue()
+        sender = asyncio.get_running_loop().create_task(self.send(answers, writer))
+        worker = self.event(DEFAULT_EVENT)
+        pending = {}  # event worker -> future of the last command this connection queued on it
+        try:
+            async for line in reader:
+                api, args = parseCall(line.decode())
+                if api == "quit":
+                    answers.put_nowait("Program Terminated!!\n")
+                    break
+                elif api == "event":
+                    try:
+                        eventID = oneArg(args)
+                        if not eventID:
+                            answers.put_nowait("Invalid input. Please provide a valid eventID\n")
+                        else:
+                            worker = self.event(eventID)
+                            answers.put_nowait(f"Event {eventID} selected\n")
+                    except Exception as e:
+                        answers.put_nowait(f"{e}\n")
+                elif api == "available":
+                    last = pending.get(worker)
+                    if last is None or last.done():
+                        answers.put_nowait(worker.available())
+                    else:
+                        answers.put_nowait(worker.availableAfter(last))
+                else:
+                    pending[worker] = worker.submit(api, args)
+                    answers.put_nowait(pending[worker])
+        except ConnectionError:
+            pass  # the client went away, commands already queued are still applied
+        finally:
+            answers.put_nowait(None)
+            try:
+                await sender
+            except ConnectionError:
+                pass
+            writer.close()
+
+    async def send(self, answers, writer) -> None:
+        """
+        writes the answers of a connection in order, waiting for the ones that are still queued on their event.
+        """
+        while True:
+            answer = await answers.get()
+            if answer is None:
+                break
+            if not isinstance(answer, str):
+                answer = await answer
+            writer.write(answer.encode() + b"\n")
+            if answers.empty():
+                await writer.drain()
+
+    async def start(self, host="127.0.0.1", port=7070):
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def serve(host, port, **options) -> None:
+    server = await TicketServer(**options).start(host, port)
+    print(f"Serving on {', '.join(str(sock.getsockname()) for sock in server.sockets)}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gator Ticket Master TCP server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7070)
+    parser.add_argument("--seat-allocator", default="heap", help=f"one of {', '.join(seats.ALLOCATORS)}")
+    parser.add_argument("--reservation-engine", default="linked", help=f"one of {', '.join(reservations.ENGINES)}")
+    parser.add_argument("--waitlist-backend", default="heap", help=f"one of {', '.join(waitlist.WAITLISTS)}")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, seatAllocator=args.seat_allocator, reservationEngine=args.reservation_engine,
+                          waitlistBackend=args.waitlist_backend))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,165 @@
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+
+from models import User
+
+# Flat binary layout of a snapshot, every section is a run of little endian 8 byte values right after the header:
+#     runs      2 * runs      int64   (start, end) of the runs of free seats, increasing
+#     bookings  2 * bookings  int64   (userID, seatID) in increasing userID, the keys of the reservation tree
+#     seats     2 * bookings  int64   (seatID, userID) in increasing seatID, the same bookings in seat order
+#     users     users         int64   waitlisted userIDs in heap order (promotion order is one)
+#     priority  users         int64   their priorities
+#     order     users         int64   their sequence numbers, the tie breaker of equal priorities
+HEADER = struct.Struct("<4sHHqqqqqqq")  # magic, version, flags, operations covered, max seat, free seats, last sequence number, runs, bookings, users
+MAGIC = b"GTMS"
+VERSION = 3
+FLAG_INITIALIZED = 1  # Initialize has been called
+FLAG_WAITLIST = 2  # the waitlist heap has been created
+
+
+def syncDirectory(directory) -> None:
+    """
+    fsync a directory so that files renamed into it survive a crash. Not every platform can open a directory, then it is skipped.
+    """
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write(gtm, path, applied=0) -> None:
+    """
+    Writes the three structures of the service to path, covering the first applied operations.
+    The file is written next to path and renamed over it, so a crash never leaves a half written snapshot behind.
+    """
+    gtm.materialize()
+    flags = (FLAG_INITIALIZED if gtm.eventInitialized else 0) | (FLAG_WAITLIST if gtm.waitlist is not None else 0)
+    runs = gtm.seats.runs() if gtm.seats is not None else []
+    max_seat = gtm.seats.max_seat if gtm.seats is not None else 0
+    free_seats = gtm.seats.size() if gtm.seats is not None else 0
+    tree = gtm.reservations
+    nodes = tree.rangeQuery(float("-inf"), float("inf"))
+    users = gtm.waitlist.users() if gtm.waitlist is not None else []
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, flags, applied, max_seat, free_seats, gtm.sequence, len(runs), len(nodes), len(users)))
+        f.write(array("q", [seat for run in runs for seat in run]).tobytes())
+        bookings = array("q")
+        for node in nodes:
+            bookings.append(tree.userOf(node))
+            bookings.append(tree.seatOf(node))
+        f.write(bookings.tobytes())
+        f.write(array("q", [value for booking in type(gtm).iterReservations(gtm) for value in booking]).tobytes())
+        f.write(array("q", [user.userID for user in users]).tobytes())
+        f.write(array("q", [user.priority for user in users]).tobytes())
+        f.write(array("q", [user.seq for user in users]).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    syncDirectory(os.path.dirname(os.path.abspath(path)))
+
+
+class MappedSnapshot:
+    """
+    Read only view of a snapshot file through mmap. Nothing is copied or decoded up front, every section is a
+    memoryview cast over the mapped pages, so opening a snapshot costs the same for any size of event and the
+    pages are only read from disk when a query touches them.
+    """
+    def __init__(self, path) -> None:
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self.map)
+        magic, version, flags, self.applied, self.maxSeat, self.freeSeats, self.sequence, n_runs, n_bookings, n_users = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} snapshot")
+        self.initialized = bool(flags & FLAG_INITIALIZED)
+        self.hasWaitlist = bool(flags & FLAG_WAITLIST)
+        self.waitlistSize = n_users
+
+        self.offset = HEADER.size
+        self.runs = self.section("q", 2 * n_runs)
+        self.bookings = self.section("q", 2 * n_bookings)
+        self.bySeat = self.section("q", 2 * n_bookings)
+        self.userIDs = self.section("q", n_users)
+        self.priorities = self.section("q", n_users)
+        self.sequences = self.section("q", n_users)
+        self.keys = self.bookings[0::2]  # userIDs of the bookings, a strided view without a copy
+        self.seatIDs = self.bySeat[0::2]
+
+    def section(self, typecode, count):
+        """
+        returns the next count values of the buffer as a typed memoryview.
+        """
+        view = self.buffer[self.offset:self.offset + count * 8].cast(typecode)
+        self.offset += count * 8
+        return view
+
+    def seatOf(self, userID):
+        """
+        returns the seat reserved by userID with a binary search over the bookings, or None if there is none.
+        """
+        idx = bisect_left(self.keys, userID)
+        if idx < len(self.keys) and self.keys[idx] == userID:
+            return self.bookings[2 * idx + 1]
+        return None
+
+    def holderOf(self, seatID):
+        """
+        returns the user holding seatID with a binary search over the bookings in seat order, or None if there is none.
+        """
+        idx = bisect_left(self.seatIDs, seatID)
+        if idx < len(self.seatIDs) and self.seatIDs[idx] == seatID:
+            return self.bySeat[2 * idx + 1]
+        return None
+
+    def items(self, start_seat=1):
+        """
+        yields (seatID, userID) for every reserved seat in increasing order of seatID, starting from start_seat.
+        """
+        bySeat = self.bySeat
+        for idx in range(bisect_left(self.seatIDs, start_seat), len(self.seatIDs)):
+            yield bySeat[2 * idx], bySeat[2 * idx + 1]
+
+    def restore(self, gtm) -> None:
+        """
+        builds the seats, the reservation tree and the waitlist of gtm from the snapshot.
+        """
+        if self.initialized:
+            gtm.eventInitialized = True
+            gtm.seats = gtm.seatAllocator.fromRuns(zip(self.runs[0::2], self.runs[1::2]), self.maxSeat)
+        gtm.reservations.bulkInsert(zip(self.keys, self.bookings[1::2]))
+        gtm.sequence = self.sequence
+        if self.hasWaitlist:
+            # the users were saved in heap order, the heap takes the array as it is instead of heapifying it again
+            gtm.waitlist = gtm.waitlistBackend.fromUsers(map(User, self.userIDs, self.priorities, self.sequences))
+
+    def close(self) -> None:
+        """
+        release the views and unmap the file.
+        """
+        for name in ("keys", "seatIDs", "runs", "bookings", "bySeat", "userIDs", "priorities", "sequences", "buffer"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        self.map.close()
+
+
+def load(gtm, path) -> int:
+    """
+    Loads a snapshot into a freshly created service and returns the number of operations it covers.
+    """
+    mapped = MappedSnapshot(path)
+    try:
+        mapped.restore(gtm)
+        return mapped.applied
+    finally:
+        mapped.close()
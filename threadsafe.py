@@ -0,0 +1,198 @@
+import threading
+
+import GatorTicketMasterService
+
+
+class ThreadSafeTicketMaster:
+    """
+    GatorTicketMaster that can be called from many threads at once. Each of the three structures has its own lock:
+    seatsLock for the seat allocator, waitlistLock for the waitlist and treeLock for the reservation tree. An
+    operation takes only the locks of the structures it touches, always in that order (seats, waitlist, tree),
+    so two operations can never wait on each other in a cycle. Waitlist only calls (ExitWaitlist, UpdatePriority,
+    positions) run alongside tree only calls (search, whoHolds, PrintReservations).
+
+    available() takes no lock. Reading the structures themselves could be torn, the size() of the heaps adds up two
+    lengths, the ranked waitlist reads its root twice and pollMany leaves the heap half sorted for a moment. So every
+    call that changes a count stores a new (freeSeats, waitlistSize) tuple on the wrapper before it releases its
+    locks, and available() formats the last tuple stored: one attribute read, never torn, at most one operation behind.
+    The counters of enableInstrumentation are not locked, under many threads they can miss a few counts.
+    """
+    def __init__(self, **options) -> None:
+        """
+        options are passed to the GatorTicketMaster constructor.
+        """
+        self.gtm = GatorTicketMasterService.GatorTicketMaster(**options)
+        self.seatsLock = threading.Lock()
+        self.waitlistLock = threading.Lock()
+        self.treeLock = threading.Lock()
+        self.sizesLock = threading.Lock()  # innermost, only held to replace sizes
+        self.sizes = None  # (freeSeats, waitlistSize) read by available(), None until the event is initialized
+
+    @classmethod
+    def openSnapshot(cls, path, **options):
+        """
+        loads a snapshot file. The structures are built right away, a lazily mapped snapshot would be materialized
+        by whichever thread changes the state first, outside of the locks of the other structures.
+        """
+        safe = cls(**options)
+        safe.gtm = GatorTicketMasterService.GatorTicketMaster.openSnapshot(path, **options)
+        safe.gtm.materialize()
+        safe.publish()
+        return safe
+
+    def __getattr__(self, name):
+        return getattr(self.gtm, name)  # stats, enableInstrumentation and the other calls that need no lock
+
+    def publish(self, seats=True, waitlist=True) -> None:
+        """
+        stores the counts of the seats and/or of the waitlist for available(). The caller holds the lock of every
+        structure it counts, the count of the other one is kept from the last tuple stored.
+        """
+        gtm = self.gtm
+        if not gtm.eventInitialized:
+            return
+        with self.sizesLock:
+            freeSeats, waitlistSize = self.sizes or (0, 0)
+            if seats:
+                freeSeats = gtm.seats.size()
+            if waitlist:
+                waitlistSize = 0 if gtm.waitlist is None else gtm.waitlist.size()
+            self.sizes = (freeSeats, waitlistSize)
+
+    def available(self):
+        sizes = self.sizes  # a single read of an immutable tuple, no lock needed
+        if sizes is None:
+            return "Seats not initialized yet!!"
+        return f"Total Seats Available : {sizes[0]}, Waitlist : {sizes[1]}"
+
+    def initialize(self, seatCount):
+        with self.seatsLock, self.waitlistLock, self.treeLock:
+            try:
+                return self.gtm.initialize(seatCount)
+            finally:
+                self.publish()
+
+    def reserve(self, userID, userPriority):
+        with self.seatsLock:
+            gtm = self.gtm
+            if gtm.eventInitialized and gtm.seats.size() == 0:
+                #no seat can be freed while seatsLock is held, the user goes to the waitlist and the tree is not touched
+                with self.waitlistLock:
+                    try:
+                        return gtm.reserve(userID, userPriority)
+                    finally:
+                        self.publish(seats=False)
+            if gtm.eventInitialized and gtm.waitlist is not None:
+                with self.treeLock:
+                    try:
+                        return gtm.reserve(userID, userPriority)
+                    finally:
+                        self.publish(waitlist=False)  # a seat is taken, the waitlist is not touched
+            #first reservation, the waitlist is created by it
+            with self.waitlistLock, self.treeLock:
+                try:
+                    return gtm.reserve(userID, userPriority)
+                finally:
+                    self.publish()
+
+    def reserveMany(self, users):
+        with self.seatsLock, self.waitlistLock, self.treeLock:
+            try:
+                return self.gtm.reserveMany(users)
+            finally:
+                self.publish()
+
+    def reserveBlock(self, userIDs, k):
+        with self.seatsLock, self.waitlistLock, self.treeLock:
+            try:
+                return self.gtm.reserveBlock(userIDs, k)
+            finally:
+                self.publish()
+
+    def cancel(self, seatID, userID):
+        with self.seatsLock, self.waitlistLock, self.treeLock:
+            try:
+                return self.gtm.cancel(seatID, userID)
+            finally:
+                self.publish()
+
+    def search(self, userID):
+        with self.treeLock:
+            return self.gtm.search(userID)
+
+    def whoHolds(self, seatID):
+        with self.treeLock:
+            return self.gtm.whoHolds(seatID)
+
+    def waitlistPosition(self, userID):
+        with self.waitlistLock:
+            return self.gtm.waitlistPosition(userID)
+
+    def waitlistTop(self, k):
+        with self.waitlistLock:
+            return self.gtm.waitlistTop(k)
+
+    def exitWaitlist(self, userID):
+        with self.waitlistLock:
+            try:
+                return self.gtm.exitWaitlist(userID)
+            finally:
+                self.publish(seats=False)
+
+    def updatePriority(self, userID, userPriority):
+        with self.waitlistLock:
+            return self.gtm.updatePriority(userID, userPriority)
+
+    def addSeats(self, count):
+        with self.seatsLock, self.waitlistLock, self.treeLock:
+            try:
+                return self.gtm.addSeats(count)
+            finally:
+                self.publish()
+
+    def printReservations(self):
+        with self.treeLock:
+            return self.gtm.printReservations()
+
+    def iterReservations(self, start_seat=None, limit=None):
+        """
+        the page is copied under the tree lock, the iterator returned does not hold the lock while it is consumed.
+        """
+        with self.treeLock:
+            return iter(list(self.gtm.iterReservations(start_seat, limit)))
+
+    def releaseSeats(self, userID1, userID2):
+        with self.seatsLock, self.waitlistLock, self.treeLock:
+            try:
+                return self.gtm.releaseSeats(userID1, userID2)
+            finally:
+                self.publish()
+
+    def check(self) -> None:
+        """
+        verifies the invariants across the three structures under all the locks, raises AssertionError if one
+        does not hold: no seat is booked twice, the tree and the seat index agree, no waitlisted user holds a seat,
+        every seat is either free or booked, and available() serves the current counts.
+        """
+        def expect(condition, message):
+            if not condition:
+                raise AssertionError(message)
+
+        with self.seatsLock, self.waitlistLock, self.treeLock:
+            gtm = self.gtm
+            if not gtm.eventInitialized:
+                return
+            tree = gtm.reservations
+            bookings = [(tree.userOf(node), tree.seatOf(node)) for node in tree.rangeQuery(float("-inf"), float("inf"))]
+            booked_seats = {seatID for _, seatID in bookings}
+            expect(len(booked_seats) == len(bookings), "a seat is booked twice")
+            expect(tree.size() == len(bookings), "seat index count out of step with the tree")
+            expect(all(tree.seatIndex.holder(seatID) == userID for userID, seatID in bookings), "seat index out of step with the tree")
+            free_seats = {seatID for start, end in gtm.seats.runs() for seatID in range(start, end + 1)}
+            expect(len(free_seats) == gtm.seats.size(), "free seat count out of step with the free seats")
+            expect(not free_seats & booked_seats, "a booked seat is also free")
+            expect(len(free_seats) + len(bookings) == gtm.seats.max_seat, "free seats + bookings is not the number of seats")
+            if gtm.waitlist is not None:
+                expect(not any(gtm.waitlist.contains(userID) for userID, _ in bookings), "a waitlisted user holds a seat")
+            expect(self.sizes == (gtm.seats.size(), 0 if gtm.waitlist is None else gtm.waitlist.size()),
+                   "counts served by available() out of step with the structures")
@@ -1,20 +1,60 @@
-from models import User
+import random
+from heapq import nsmallest
+from operator import attrgetter
+
+from models import User, packKey
 
 class MinHeapUser:
     """
     Class to create a min binary heap for user waitlist. Provides basic operations like push, poll/pop, size, isEmpty, heapifyUp & heapifyDown
     Also additional functionality to update any user priority and remove any specific user based on its id.
+    It is an indexed priority queue, every userID is mapped to its current index in the heap array so that lookups do not need a scan.
+    Users are ordered by their packed key alone, so every comparison is a single int comparison.
     """
     def __init__(self):
         self.heap = []  # start with an empty array
+        self.position = {}  # userID -> index of the user node in heap, kept up to date on every swap
+
+    @classmethod
+    def fromUsers(cls, users):
+        """
+        builds a waitlist from users that are already in heap order, as returned by users(), without heapifying again.
+        """
+        waitlist = cls()
+        waitlist.heap = list(users)
+        waitlist.position = {user.userID: idx for idx, user in enumerate(waitlist.heap)}
+        return waitlist
+
+    def users(self) -> list:
+        """
+        returns the user nodes in heap order.
+        """
+        return self.heap
 
     def push(self, user: User):
         """
         Add a user node onto heap.
         """
         self.heap.append(user)
+        self.position[user.userID] = len(self.heap) - 1
         self.heapifyUp(len(self.heap) - 1)
 
+    def pushMany(self, users) -> None:
+        """
+        Add a batch of user nodes. A large batch is appended as is and the heap is rebuilt with an O(n) heapify,
+        a small one is pushed node by node.
+        """
+        users = list(users)
+        if len(users) * 4 < len(self.heap):
+            for user in users:
+                self.push(user)
+            return
+        for user in users:
+            self.position[user.userID] = len(self.heap)
+            self.heap.append(user)
+        for idx in range(len(self.heap) // 2 - 1, -1, -1):
+            self.heapifyDown(idx)
+
     def poll(self):
         """
         pops the top most/ min element (User Node) from the heap and returns it as well.
@@ -22,42 +62,107 @@ class MinHeapUser:
         """
         if len(self.heap) > 0:
             root = self.heap[0]
-            self.heap[0] = self.heap[-1] #exchange with the last element, heapify down handles the structure later.
+            self.swap(0, len(self.heap) - 1) #exchange with the last element, heapify down handles the structure later.
             self.heap.pop()  # after swapping, the last element is the min element or previous root.
+            del self.position[root.userID]
             self.heapifyDown(0)
             return root
         return None
 
+    def pollMany(self, count) -> list:
+        """
+        pops the first count users (or all of them if there are fewer) in the order poll would return them.
+        For a large batch the heap is sorted once, the sorted remainder is itself a valid min heap.
+        """
+        heap = self.heap
+        if count * 16 >= len(heap):
+            heap.sort(key=attrgetter("key"))
+            taken = heap[:count]
+            del heap[:count]
+            self.position = {user.userID: idx for idx, user in enumerate(heap)}
+            return taken
+        return [self.poll() for _ in range(count)]
+
+    def contains(self, user_id) -> bool:
+        """
+        returns True if the user with given userID is currently in the waitlist. O(1) lookup on the position map.
+        """
+        return user_id in self.position
+
+    def usersInRange(self, lo, hi) -> list:
+        """
+        returns the userIDs in the range [lo, hi] that are currently in the waitlist, in increasing order.
+        Walks whichever is smaller, the range of ids or the waitlist itself.
+        """
+        if hi - lo + 1 <= len(self.position):
+            return [user_id for user_id in range(lo, hi + 1) if user_id in self.position]
+        return sorted(user_id for user_id in self.position if lo <= user_id <= hi)
+
+    def rank(self, user_id):
+        """
+        returns the 1 based position of the user in the promotion order, or None if not waitlisted.
+        The heap keeps no order between siblings, so this counts every user served before it, O(n).
+        """
+        i = self.position.get(user_id)
+        if i is None:
+            return None
+        key = self.heap[i].key
+        return 1 + sum(1 for user in self.heap if user.key < key)
+
+    def topK(self, k) -> list:
+        """
+        returns the userIDs of the next k users to be promoted, in promotion order. O(n log k).
+        """
+        return [user.userID for user in nsmallest(k, self.heap, key=attrgetter("key"))]
+
     def updatePriority(self, user_id, new_priority) -> bool:
         """
         function to update the priority for any specific user based on its userID
         """
-        for i in range(len(self.heap)):
-            if self.heap[i].userID == user_id:
-                if self.heap[i].priority < new_priority:
-                    self.heap[i].priority = new_priority
-                    self.heapifyUp(i) #since priority is increased need to heapifyup the node again.
-                else:
-                    self.heap[i].priority = new_priority
-                    self.heapifyDown(i) #since priority is decreased need to heapifydown the node again.
-                
-                return True
-            
-        return False
+        i = self.position.get(user_id)
+        if i is None:
+            return False
+
+        user = self.heap[i]
+        increased = user.priority < new_priority
+        user.priority = new_priority
+        user.key = packKey(new_priority, user.seq) #the original sequence number is kept
+        if increased:
+            self.heapifyUp(i) #since priority is increased need to heapifyup the node again.
+        else:
+            self.heapifyDown(i) #since priority is decreased need to heapifydown the node again.
+        return True
 
     def remove(self, user_id) -> bool:
         """
         function to remove any specific user based on userID from the waitlist/heap
         """
-        for i in range(len(self.heap)):
-            if self.heap[i].userID == user_id:
-                self.heap[i] = self.heap[-1] #when matched found, swap with the last element.
-                self.heap.pop() #pop the matched element from list
-                self.heapifyDown(i) 
-                return True
-            
-        return False
-            
+        i = self.position.pop(user_id, None)
+        if i is None:
+            return False
+
+        last = self.heap.pop() #pop the last element, it fills the hole left by the removed user.
+        if i < len(self.heap):
+            self.heap[i] = last
+            self.position[last.userID] = i
+            #the moved element can be out of order in either direction, only one of these will move it.
+            self.heapifyUp(i)
+            self.heapifyDown(self.position[last.userID])
+        return True
+
+    def removeMany(self, user_ids) -> int:
+        """
+        removes every waitlisted user of user_ids, returns how many were removed.
+        """
+        return sum(1 for user_id in user_ids if self.remove(user_id))
+
+    def swap(self, i, j) -> None:
+        """
+        swap two nodes in the heap array and update their entries in the position map.
+        """
+        self.heap[i], self.heap[j] = self.heap[j], self.heap[i]
+        self.position[self.heap[i].userID] = i
+        self.position[self.heap[j].userID] = j
 
     def size(self) -> int:
         """
@@ -76,13 +181,20 @@ class MinHeapUser:
         Performs the heapify opertaion on array from bottom to up, as new elements are added at the end of array.
         Compares the values with parent, swap if required and repeat the process.
         """
+        heap, position = self.heap, self.position
+        user = heap[idx]
+        key = user.key
         while idx > 0:
             parent_index = (idx - 1) // 2
-            if (self.heap[parent_index].priority < self.heap[idx].priority) or (self.heap[parent_index].priority == self.heap[idx].priority and (self.heap[parent_index].timeStamp - self.heap[idx].timeStamp > 0)):
-                self.heap[parent_index], self.heap[idx] = self.heap[idx], self.heap[parent_index]
-                idx = parent_index
-            else:
+            parent = heap[parent_index]
+            if parent.key <= key:
                 break
+            #move the parent down into the hole, the user is written once at its final index
+            heap[idx] = parent
+            position[parent.userID] = idx
+            idx = parent_index
+        heap[idx] = user
+        position[user.userID] = idx
 
     def heapifyDown(self, idx) -> None:
         """
@@ -90,18 +202,400 @@ class MinHeapUser:
         Now the last element maybe the max element or not, is at root and compared with its left and right child at each level is swapped accordingly,
         and moves down to its correct position.
         """
-        left_child = 2 * idx + 1
-        right_child = 2 * idx + 2
-        smallest = idx #assume the curr index is smallest
+        heap, position = self.heap, self.position
+        size = len(heap)
+        if idx >= size:
+            return
+        user = heap[idx]
+        key = user.key
+        while True:
+            left_child = 2 * idx + 1
+            if left_child >= size:
+                break
+            #pick the child with the smaller key
+            child = left_child
+            right_child = left_child + 1
+            if right_child < size and heap[right_child].key < heap[left_child].key:
+                child = right_child
+            if heap[child].key >= key:
+                break
+            #move the child up into the hole and continue one level down
+            heap[idx] = heap[child]
+            position[heap[idx].userID] = idx
+            idx = child
+        heap[idx] = user
+        position[user.userID] = idx
+
+
+class LazyMinHeapUser(MinHeapUser):
+    """
+    MinHeapUser with lazy deletion. remove only marks the userID as dead, the user stays in the heap array until it
+    reaches the top, where poll drops it, or until the tombstones pass compactRatio of the array and the heap is
+    rebuilt from the live users with an O(n) heapify. A mass exit of k users is O(k) plus the amortized rebuild.
+    size() and contains() only count live users.
+    """
+    compactRatio = 0.5  # rebuild once the dead users are more than this share of the heap array
+
+    def __init__(self):
+        super().__init__()
+        self.dead = set()  # userIDs removed but still in the heap array, they keep their position entry
+
+    def push(self, user: User):
+        if user.userID in self.dead:
+            #the user exited and joined again, the new node takes the place of its dead one
+            self.dead.discard(user.userID)
+            i = self.position[user.userID]
+            self.heap[i] = user
+            self.heapifyUp(i)
+            self.heapifyDown(self.position[user.userID])
+            return
+        super().push(user)
+
+    def pushMany(self, users) -> None:
+        users = list(users)
+        if self.dead and not self.dead.isdisjoint(user.userID for user in users):
+            self.compact()
+        super().pushMany(users)
+
+    def poll(self):
+        heap, dead = self.heap, self.dead
+        while dead and heap and heap[0].userID in dead:
+            dead.discard(heap[0].userID)
+            super().poll()
+        return super().poll()
+
+    def pollMany(self, count) -> list:
+        if self.dead and count * 16 >= len(self.heap):
+            self.compact()  # the batch sorts the whole array anyway
+        return super().pollMany(count)
+
+    def contains(self, user_id) -> bool:
+        return user_id in self.position and user_id not in self.dead
+
+    def usersInRange(self, lo, hi) -> list:
+        return [user_id for user_id in super().usersInRange(lo, hi) if user_id not in self.dead]
+
+    def rank(self, user_id):
+        if not self.contains(user_id):
+            return None
+        key = self.heap[self.position[user_id]].key
+        dead = self.dead
+        return 1 + sum(1 for user in self.heap if user.key < key and user.userID not in dead)
+
+    def topK(self, k) -> list:
+        dead = self.dead
+        return [user.userID for user in nsmallest(k, (user for user in self.heap if user.userID not in dead), key=attrgetter("key"))]
+
+    def users(self) -> list:
+        if self.dead:
+            self.compact()  # only the live users, still in heap order
+        return self.heap
+
+    def updatePriority(self, user_id, new_priority) -> bool:
+        if user_id in self.dead:
+            return False
+        return super().updatePriority(user_id, new_priority)
+
+    def remove(self, user_id) -> bool:
+        if not self.contains(user_id):
+            return False
+        self.dead.add(user_id)
+        if len(self.dead) > self.compactRatio * len(self.heap):
+            self.compact()
+        return True
+
+    def removeMany(self, user_ids) -> int:
+        """
+        marks every waitlisted user of user_ids as dead, the rebuild is checked once for the whole batch.
+        """
+        removed = 0
+        dead, position = self.dead, self.position
+        for user_id in user_ids:
+            if user_id in position and user_id not in dead:
+                dead.add(user_id)
+                removed += 1
+        if len(dead) > self.compactRatio * len(self.heap):
+            self.compact()
+        return removed
+
+    def size(self) -> int:
+        return len(self.heap) - len(self.dead)
+
+    def isEmpty(self) -> bool:
+        return len(self.heap) == len(self.dead)
+
+    def compact(self) -> None:
+        """
+        drops the dead users from the array and rebuilds the heap and the position map, O(n).
+        """
+        dead = self.dead
+        self.heap = [user for user in self.heap if user.userID not in dead]
+        dead.clear()
+        self.position = {user.userID: idx for idx, user in enumerate(self.heap)}
+        for idx in range(len(self.heap) // 2 - 1, -1, -1):
+            self.heapifyDown(idx)
+
 
-        if (left_child < len(self.heap) and (self.heap[left_child].priority > self.heap[smallest].priority)) or (left_child < len(self.heap) and (self.heap[left_child].priority == self.heap[smallest].priority) and (self.heap[left_child].timeStamp - self.heap[smallest].timeStamp < 0)):
-            smallest = left_child
-        if (right_child < len(self.heap) and (self.heap[right_child].priority > self.heap[smallest].priority)) or (right_child < len(self.heap) and (self.heap[right_child].priority == self.heap[smallest].priority) and (self.heap[right_child].timeStamp - self.heap[smallest].timeStamp < 0)):
-            smallest = right_child
-        if smallest != idx:
-            #swap elements
-            self.heap[smallest], self.heap[idx] = self.heap[idx], self.heap[smallest]
-             #compare it recursively
-            self.heapifyDown(smallest)
+class RankNode:
+    """
+    node of the RankedWaitlist treap. weight is the random heap priority of the treap, size the number of nodes
+    in the subtree rooted here.
+    """
+    __slots__ = ("user", "key", "weight", "size", "left", "right")
+
+    def __init__(self, user: User, weight) -> None:
+        self.user = user
+        self.key = user.key
+        self.weight = weight
+        self.size = 1
+        self.left = None
+        self.right = None
+
+
+class RankedWaitlist:
+    """
+    Waitlist backed by a treap ordered on the packed user key, the same order the heap promotes users in.
+    Every node keeps the size of its subtree, so the position of a user in the line (rank) is answered in O(log n)
+    and the next k users (topK) in O(k + log n). push, poll, updatePriority and remove are O(log n) expected.
+    Same interface as MinHeapUser, it is slower on push and poll and only worth it when positions are queried.
+    """
+    def __init__(self):
+        self.root = None
+        self.position = {}  # userID -> tree node of the user
+        self.random = random.Random(20).random  # seeded, the same operations always build the same tree
+
+    @classmethod
+    def fromUsers(cls, users):
+        """
+        builds a waitlist from user nodes in any order.
+        """
+        waitlist = cls()
+        waitlist.pushMany(users)
+        return waitlist
+
+    def users(self) -> list:
+        """
+        returns the user nodes in promotion order, which is also a valid heap order.
+        """
+        return [node.user for node in self.inorder(len(self.position))]
+
+    def push(self, user: User):
+        node = RankNode(user, self.random())
+        self.position[user.userID] = node
+        self.insert(node)
+
+    def pushMany(self, users) -> None:
+        """
+        Add a batch of user nodes. Into an empty waitlist the users are sorted and the treap is built in one pass
+        over them with a stack (a Cartesian tree on the weights), otherwise they are pushed one by one.
+        """
+        if self.root is not None:
+            for user in users:
+                self.push(user)
+            return
+        users = sorted(users, key=attrgetter("key"))
+        stack = []
+        for user in users:
+            node = RankNode(user, self.random())
+            self.position[user.userID] = node
+            last = None
+            while stack and stack[-1].weight < node.weight:
+                #a popped node gets no more children, its size is final
+                last = stack.pop()
+                last.size = 1 + (last.left.size if last.left else 0) + (last.right.size if last.right else 0)
+            node.left = last
+            if stack:
+                stack[-1].right = node
+            stack.append(node)
+        while stack:
+            last = stack.pop()
+            last.size = 1 + (last.left.size if last.left else 0) + (last.right.size if last.right else 0)
+        self.root = last if users else None
+
+    def poll(self):
+        """
+        removes the first user in line and returns it, or None if the waitlist is empty.
+        """
+        node = self.root
+        if node is None:
+            return None
+        parent = None
+        while node.left is not None:
+            node.size -= 1
+            parent = node
+            node = node.left
+        if parent is None:
+            self.root = node.right
+        else:
+            parent.left = node.right
+        del self.position[node.user.userID]
+        return node.user
+
+    def pollMany(self, count) -> list:
+        """
+        removes the first count users (or all of them if there are fewer) and returns them in promotion order.
+        """
+        if count >= len(self.position):
+            users = self.users()
+            self.root = None
+            self.position = {}
+            return users
+        return [self.poll() for _ in range(count)]
+
+    def contains(self, user_id) -> bool:
+        return user_id in self.position
+
+    def usersInRange(self, lo, hi) -> list:
+        """
+        returns the userIDs in the range [lo, hi] that are currently in the waitlist, in increasing order.
+        """
+        if hi - lo + 1 <= len(self.position):
+            return [user_id for user_id in range(lo, hi + 1) if user_id in self.position]
+        return sorted(user_id for user_id in self.position if lo <= user_id <= hi)
+
+    def rank(self, user_id):
+        """
+        returns the 1 based position of the user in the promotion order, or None if not waitlisted.
+        Walks down from the root to the node and adds up the sizes of the subtrees left of the path.
+        """
+        node = self.position.get(user_id)
+        if node is None:
+            return None
+        key = node.key
+        rank = 1 + (node.left.size if node.left else 0)
+        current = self.root
+        while current is not node:
+            if key < current.key:
+                current = current.left
+            else:
+                rank += 1 + (current.left.size if current.left else 0)
+                current = current.right
+        return rank
+
+    def topK(self, k) -> list:
+        """
+        returns the userIDs of the next k users to be promoted, in promotion order.
+        """
+        return [node.user.userID for node in self.inorder(k)]
+
+    def updatePriority(self, user_id, new_priority) -> bool:
+        node = self.position.get(user_id)
+        if node is None:
+            return False
+        self.unlink(node)
+        user = node.user
+        user.priority = new_priority
+        user.key = node.key = packKey(new_priority, user.seq) #the original sequence number is kept
+        node.left = node.right = None
+        self.insert(node)
+        return True
+
+    def remove(self, user_id) -> bool:
+        node = self.position.pop(user_id, None)
+        if node is None:
+            return False
+        self.unlink(node)
+        return True
+
+    def removeMany(self, user_ids) -> int:
+        return sum(1 for user_id in user_ids if self.remove(user_id))
+
+    def size(self) -> int:
+        return self.root.size if self.root is not None else 0
+
+    def isEmpty(self) -> bool:
+        return self.root is None
+
+    def inorder(self, limit):
+        """
+        yields up to limit nodes in key order, with an explicit stack.
+        """
+        stack = []
+        node = self.root
+        while limit > 0 and (stack or node is not None):
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node
+            limit -= 1
+            node = node.right
+
+    def insert(self, node) -> None:
+        """
+        links a detached node into the tree: walks down while the nodes on the path have a higher weight,
+        then the subtree found there is split around the key and becomes the children of the node.
+        """
+        key, weight = node.key, node.weight
+        parent = None
+        went_left = False
+        current = self.root
+        while current is not None and current.weight > weight:
+            current.size += 1
+            parent = current
+            went_left = key < current.key
+            current = current.left if went_left else current.right
+        node.left, node.right = self.split(current, key)
+        node.size = 1 + (node.left.size if node.left else 0) + (node.right.size if node.right else 0)
+        self.replaceChild(parent, went_left, node)
+
+    def unlink(self, node) -> None:
+        """
+        removes a node from the tree, its two subtrees are merged in its place.
+        """
+        key = node.key
+        parent = None
+        went_left = False
+        current = self.root
+        while current is not node:
+            current.size -= 1
+            parent = current
+            went_left = key < current.key
+            current = current.left if went_left else current.right
+        self.replaceChild(parent, went_left, self.merge(node.left, node.right))
+
+    def replaceChild(self, parent, left, child) -> None:
+        if parent is None:
+            self.root = child
+        elif left:
+            parent.left = child
+        else:
+            parent.right = child
+
+    def split(self, node, key):
+        """
+        splits the subtree into the nodes with a smaller key and the nodes with a larger key.
+        """
+        if node is None:
+            return None, None
+        if node.key < key:
+            node.right, right = self.split(node.right, key)
+            node.size = 1 + (node.left.size if node.left else 0) + (node.right.size if node.right else 0)
+            return node, right
+        left, node.left = self.split(node.left, key)
+        node.size = 1 + (node.left.size if node.left else 0) + (node.right.size if node.right else 0)
+        return left, node
+
+    def merge(self, left, right):
+        """
+        joins two subtrees where every key of left is smaller than every key of right.
+        """
+        if left is None:
+            return right
+        if right is None:
+            return left
+        if left.weight > right.weight:
+            left.size += right.size
+            left.right = self.merge(left.right, right)
+            return left
+        right.size += left.size
+        right.left = self.merge(left, right.left)
+        return right
 
 
+# name -> waitlist class, selected with the waitlistBackend option of the service
+WAITLISTS = {
+    "heap": MinHeapUser,
+    "lazy": LazyMinHeapUser,
+    "ranked": RankedWaitlist,
+}
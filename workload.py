@@ -0,0 +1,170 @@
+"""
+Seeded workload generator for the Gator Ticket Master service. Every trace is a generator of (method, args) calls on
+GatorTicketMaster that models one phase of an on-sale, and always starts with its initialize call. The same trace
+name, size and seed give the same calls, so runs can be compared across engine changes.
+"""
+import random
+from itertools import accumulate
+from bisect import bisect_left
+
+HOLDER = None  # userID argument of a cancel that means "the user currently holding the seat", resolved by the runner
+
+
+def zipfSampler(rng, count, s=1.1):
+    """
+    returns a function drawing ranks in [0, count) with probability proportional to 1 / (rank + 1) ** s,
+    so a few hot ranks get most of the draws.
+    """
+    cumulative = list(accumulate(1 / (rank + 1) ** s for rank in range(count)))
+    total = cumulative[-1]
+    return lambda: min(bisect_left(cumulative, rng.random() * total), count - 1)
+
+
+def burst(n, rng):
+    """
+    ticket drop: bursts of new users reserving at once, more users than seats, with an Available check after every burst.
+    """
+    yield "initialize", (n // 2,)
+    userID = 0
+    calls = 1
+    while calls < n:
+        for _ in range(min(rng.randint(1, 200), n - calls)):
+            userID += 1
+            yield "reserve", (userID, rng.randint(1, 10))
+            calls += 1
+        if calls < n:
+            yield "available", ()
+            calls += 1
+
+
+def zipf(n, rng):
+    """
+    a full event with a long waitlist, then priority updates skewed towards a few hot users (Zipf distributed).
+    """
+    seats = max(n // 10, 1)
+    users = n // 2
+    yield "initialize", (seats,)
+    for userID in range(1, users + 1):
+        yield "reserve", (userID, rng.randint(1, 10))
+    waitlisted = users - seats
+    if waitlisted <= 0:
+        return
+    order = list(range(seats + 1, users + 1))
+    rng.shuffle(order)  # the hot users are spread over the waitlist, not the first arrivals
+    hot = zipfSampler(rng, waitlisted)
+    for _ in range(n - users - 1):
+        yield "updatePriority", (order[hot()], rng.randint(1, 10))
+
+
+def release(n, rng):
+    """
+    bookings and a waitlist, then mass ReleaseSeats over ranges of userIDs, each followed by new reservations.
+    """
+    users = n // 2
+    yield "initialize", (users // 2,)
+    for userID in range(1, users + 1):
+        yield "reserve", (userID, rng.randint(1, 10))
+    width = max(users // 100, 1)
+    next_user = users
+    calls = users + 1
+    while calls < n:
+        lo = rng.randint(1, max(next_user - width, 1))
+        yield "releaseSeats", (lo, lo + width - 1)
+        calls += 1
+        for _ in range(min(width // 2, n - calls)):
+            next_user += 1
+            yield "reserve", (next_user, rng.randint(1, 10))
+            calls += 1
+
+
+def addSeats(n, rng):
+    """
+    a small first allotment with demand far above it, and periodic AddSeats that serve the waitlist in batches.
+    """
+    step = max(n // 1000, 1)
+    yield "initialize", (step,)
+    userID = 0
+    calls = 1
+    while calls < n:
+        for _ in range(min(10 * step, n - calls)):
+            userID += 1
+            yield "reserve", (userID, rng.randint(1, 10))
+            calls += 1
+        if calls < n:
+            yield "addSeats", (step,)
+            calls += 1
+
+
+def churn(n, rng):
+    """
+    a sold out event with a waitlist, then cancellations by seat holders (every one rebooks a waitlisted user),
+    new reservations, ExitWaitlist and Available checks.
+    """
+    seats = max(n // 4, 1)
+    users = n // 2
+    yield "initialize", (seats,)
+    for userID in range(1, users + 1):
+        yield "reserve", (userID, rng.randint(1, 10))
+    next_user = users
+    for _ in range(n - users - 1):
+        kind = rng.random()
+        if kind < 0.5:
+            yield "cancel", (rng.randint(1, seats), HOLDER)
+        elif kind < 0.8:
+            next_user += 1
+            yield "reserve", (next_user, rng.randint(1, 10))
+        elif kind < 0.95:
+            yield "exitWaitlist", (rng.randint(1, next_user),)
+        else:
+            yield "available", ()
+
+
+def onsale(n, rng):
+    """
+    all ten operations mixed: the phases above interleaved at random, plus paginated PrintReservations.
+    """
+    seats = max(n // 8, 1)
+    yield "initialize", (seats,)
+    next_user = 0
+    max_seat = seats
+    hot = zipfSampler(rng, 1000)
+    for _ in range(n - 1):
+        kind = rng.random()
+        if kind < 0.45 or next_user == 0:
+            next_user += 1
+            yield "reserve", (next_user, rng.randint(1, 10))
+        elif kind < 0.6:
+            yield "cancel", (rng.randint(1, max_seat), HOLDER)
+        elif kind < 0.75:
+            yield "updatePriority", (max(next_user - hot(), 1), rng.randint(1, 10))
+        elif kind < 0.85:
+            yield "available", ()
+        elif kind < 0.93:
+            yield "exitWaitlist", (rng.randint(1, next_user),)
+        elif kind < 0.97:
+            yield "iterReservations", (rng.randint(1, max_seat), 100)
+        elif kind < 0.995:
+            lo = rng.randint(1, next_user)
+            yield "releaseSeats", (lo, lo + rng.randint(0, 10))
+        else:
+            count = max(seats // 100, 1)
+            max_seat += count
+            yield "addSeats", (count,)
+
+
+# trace name -> generator function taking (n, rng)
+TRACES = {
+    "burst": burst,
+    "zipf": zipf,
+    "release": release,
+    "addseats": addSeats,
+    "churn": churn,
+    "onsale": onsale,
+}
+
+
+def trace(name, n, seed=0):
+    """
+    returns the calls of the named trace for about n calls, generated lazily.
+    """
+    return TRACES[name](n, random.Random(seed))